@@ -1,44 +1,295 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
-from scipy.io.wavfile import write
 
 SAMPLE_RATE = 100000
 AMPLITUDE = 1
 DURATION = 4
+BLOCK_SIZE = 2 ** 16
+# elements in one (tones x samples) intermediate of evaluate_interference
+CHUNK_SIZE = 2 ** 20
+# longest single period the FFT engine will synthesize before falling back
+MAX_FFT_PERIOD = 2 ** 21
+
+MANIFEST = "beat_audio_manifest.json"
+
+PRESETS = {
+    "wave240.wav": [240],
+    "waves2beat.wav": [240, 242],
+    "waves3beat.wav": [240, 242, 244],
+    "waves5beat.wav": [240, 242, 244, 246, 248],
+    "waves20beat.wav": [240 + i for i in range(0, 40, 2)],
+    "waves50beat.wav": [240 + i for i in range(0, 100, 2)],
+    "waves101beat.wav": [240 + i for i in range(0, 202, 2)],
+}
+
+# WAVE_FORMAT_PCM and WAVE_FORMAT_IEEE_FLOAT
+WAV_FORMATS = {np.dtype(np.int16): 1, np.dtype(np.float32): 3}
 
 def define_wave(amplitude, frequency):
     return lambda t: amplitude * np.sin(2 * np.pi * frequency * t)
 
-def basic_wave(freq, t):
-    audio = define_wave(AMPLITUDE, freq)(t)
+def basic_wave(freq, t, amplitude=AMPLITUDE):
+    audio = define_wave(amplitude, freq)(t)
+    return audio
+
+def interference(freqs, t, amplitude=AMPLITUDE):
+    return np.sum([define_wave(amplitude, freq)(t) for freq in freqs], axis=0)
+
+def fft_period(freqs, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE):
+    # Length in samples of a block on whose FFT bin grid every tone falls, or
+    # None if there is no usable one. The block length itself is preferred;
+    # otherwise the signal's own period sample_rate / gcd(sample_rate, freqs)
+    # is used, provided it stays below MAX_FFT_PERIOD.
+    freqs = np.asarray(freqs, dtype=float)
+    if len(freqs) == 0 or np.any(freqs < 0) or np.any(freqs > sample_rate / 2):
+        return None
+
+    bins = freqs * block_size / sample_rate
+    if np.allclose(bins, np.rint(bins), rtol=0, atol=1e-9):
+        return block_size
+
+    if sample_rate != int(sample_rate) or not np.allclose(freqs, np.rint(freqs), rtol=0, atol=1e-9):
+        return None
+    period = int(sample_rate) // math.gcd(int(sample_rate), *(int(f) for f in np.rint(freqs)))
+    return period if period <= MAX_FFT_PERIOD else None
+
+def fft_block(freqs, period, sample_rate=SAMPLE_RATE, amplitude=AMPLITUDE):
+    # One period of the tone comb from a single inverse real FFT: a sine of
+    # amplitude A in bin k is the coefficient -i * A * period / 2.
+    spectrum = np.zeros(period // 2 + 1, dtype=complex)
+    for freq in freqs:
+        spectrum[int(round(freq * period / sample_rate))] += -0.5j * amplitude * period
+    return np.fft.irfft(spectrum, n=period)
+
+def direct_blocks(freqs, n_samples, sample_rate, block_size, amplitude=AMPLITUDE):
+    # Time is rebuilt from the absolute sample index of each block, so phase
+    # stays continuous across block boundaries and memory is bounded by
+    # block_size, not by the file length.
+    for start in range(0, n_samples, block_size):
+        t = np.arange(start, min(start + block_size, n_samples)) / sample_rate
+        block = np.zeros_like(t)
+        for freq in freqs:
+            block += define_wave(amplitude, freq)(t)
+        yield block
+
+def fft_blocks(freqs, n_samples, sample_rate, block_size, period, amplitude=AMPLITUDE):
+    # The comb is periodic in `period` samples, so every block is a wrapped
+    # slice of a single synthesized period, whatever the number of tones.
+    base = fft_block(freqs, period, sample_rate, amplitude)
+    for start in range(0, n_samples, block_size):
+        yield np.take(base, np.arange(start, min(start + block_size, n_samples)), mode="wrap")
+
+def progression_step(freqs):
+    # Common difference of freqs taken as a set, or None if they are not
+    # evenly spaced. Fewer than two tones count as a progression of step 0.
+    freqs = np.sort(np.asarray(freqs, dtype=float))
+    if len(freqs) < 2:
+        return 0.0
+    steps = np.diff(freqs)
+    if np.allclose(steps, steps[0], rtol=0, atol=1e-9 * max(1, abs(steps[0]))):
+        return float(steps[0])
+    return None
+
+def dirichlet_interference(base, step, n, t, amplitude=AMPLITUDE):
+    # Closed form of sum(sin(2 pi (base + k step) t) for k < n): a carrier at
+    # the mean frequency times the Dirichlet kernel sin(n pi step t) / sin(pi step t).
+    # The kernel is evaluated around the nearest integer m of step t, where
+    # its numerator and denominator both vanish: with eps = pi (step t - m),
+    # it equals (-1)^(m (n - 1)) sin(n eps) / sin(eps), and n where eps == 0.
+    t = np.asarray(t, dtype=float)
+    carrier = np.sin(2 * np.pi * (base + (n - 1) * step / 2) * t)
+    cycles = step * t
+    m = np.rint(cycles)
+    eps = np.pi * (cycles - m)
+    singular = eps == 0
+    safe = np.where(singular, 1, eps)
+    kernel = np.where(singular, n, np.sin(n * safe) / np.sin(safe))
+    sign = np.where(m * (n - 1) % 2, -1, 1)
+    return amplitude * carrier * sign * kernel
+
+def evaluate_interference(freqs, t, amplitude=AMPLITUDE, chunk_size=CHUNK_SIZE):
+    # Vectorized interference(). Evenly spaced tones (every comb in the beat
+    # scenes) use the closed form, O(samples) whatever their number; other
+    # sets broadcast the phases of all tones against a chunk of samples at
+    # once, chunk_size bounding the intermediate array.
+    freqs = np.asarray(freqs, dtype=float)
+    t = np.asarray(t, dtype=float)
+    step = progression_step(freqs)
+    if len(freqs) and step is not None:
+        return dirichlet_interference(freqs.min(), step, len(freqs), t, amplitude)
+    flat = t.ravel()
+    audio = np.empty(flat.shape)
+    step = max(1, chunk_size // max(1, len(freqs)))
+    for start in range(0, len(flat), step):
+        phase = np.multiply.outer(2 * np.pi * freqs, flat[start:start + step])
+        audio[start:start + step] = amplitude * np.sin(phase).sum(axis=0)
+    return audio.reshape(t.shape)
+
+def stream_interference(freqs, sample_rate=SAMPLE_RATE, duration=DURATION, block_size=BLOCK_SIZE, engine="auto", amplitude=AMPLITUDE):
+    # Yield the superposition block by block. engine is "direct", "fft", or
+    # "auto", which uses the FFT engine whenever the tones fit a bin grid.
+    n_samples = int(sample_rate * duration)
+    if engine not in ("auto", "direct", "fft"):
+        raise ValueError(f"Unknown synthesis engine: {engine}")
+
+    period = None if engine == "direct" else fft_period(freqs, sample_rate, block_size)
+    if period is None:
+        if engine == "fft":
+            raise ValueError("Frequencies do not fall on an FFT bin grid")
+        return direct_blocks(freqs, n_samples, sample_rate, block_size, amplitude)
+    return fft_blocks(freqs, n_samples, sample_rate, block_size, period, amplitude)
+
+def engine_error(freqs, sample_rate=SAMPLE_RATE, duration=DURATION, block_size=BLOCK_SIZE, engine="auto"):
+    # Largest absolute deviation of a streaming engine from interference()
+    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+    reference = interference(freqs, t)
+    streamed = np.concatenate(list(stream_interference(freqs, sample_rate, duration, block_size, engine)))
+    return np.abs(streamed - reference).max()
+
+def convert_block(block, dtype, peak):
+    # int16 is scaled so that `peak` maps to full scale, float32 is written as is
+    if dtype == np.int16:
+        block = np.rint(block * (np.iinfo(np.int16).max / peak))
+        return np.clip(block, -32768, 32767).astype(np.int16)
+    return block.astype(dtype)
+
+def wav_header(n_samples, sample_rate, dtype):
+    fmt_tag = WAV_FORMATS[dtype]
+    data_size = n_samples * dtype.itemsize
+    fmt = struct.pack(
+        "<HHIIHH",
+        fmt_tag,
+        1,
+        sample_rate,
+        sample_rate * dtype.itemsize,
+        dtype.itemsize,
+        dtype.itemsize * 8,
+    )
+    chunks = b""
+    if fmt_tag != 1:
+        # non-PCM formats carry an (empty) extension and a fact chunk
+        fmt += struct.pack("<H", 0)
+        chunks += b"fact" + struct.pack("<II", 4, n_samples)
+    chunks = b"fmt " + struct.pack("<I", len(fmt)) + fmt + chunks
+    chunks += b"data" + struct.pack("<I", data_size)
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks) + data_size) + b"WAVE" + chunks
+
+def write_stream(name, blocks, n_samples, sample_rate=SAMPLE_RATE, dtype=np.float32, peak=1.0):
+    # Pre-size the WAV file and memory-map its data chunk, then copy each block
+    # into place so the full signal never has to exist in memory.
+    dtype = np.dtype(dtype)
+    header = wav_header(n_samples, sample_rate, dtype)
+    with open(name, "wb") as f:
+        f.write(header)
+        f.truncate(len(header) + n_samples * dtype.itemsize)
+    if n_samples == 0:
+        return
+
+    data = np.memmap(name, dtype=dtype.newbyteorder("<"), mode="r+", offset=len(header), shape=(n_samples,))
+    pos = 0
+    for block in blocks:
+        data[pos:pos + len(block)] = convert_block(block, dtype, peak)
+        pos += len(block)
+    data.flush()
+    del data
+
+def synthesize(freqs, sample_rate=SAMPLE_RATE, duration=DURATION, dtype=np.float64, block_size=BLOCK_SIZE, engine="auto", amplitude=AMPLITUDE):
+    # The whole signal as one array, filled block by block in the target dtype
+    dtype = np.dtype(dtype)
+    audio = np.empty(int(sample_rate * duration), dtype=dtype)
+    pos = 0
+    for block in stream_interference(freqs, sample_rate, duration, block_size, engine, amplitude):
+        audio[pos:pos + len(block)] = convert_block(block, dtype, amplitude * len(freqs))
+        pos += len(block)
     return audio
 
-def interference(freqs, t):
-    return np.sum([define_wave(AMPLITUDE, freq)(t) for freq in freqs], axis=0)
-    
-def main():
-    t = np.linspace(0, DURATION, int(SAMPLE_RATE * DURATION), endpoint=False)
-    
-    # name = "wave240.wav"
-    # audio = basic_wave(240, t)
+def write_interference(name, freqs, sample_rate=SAMPLE_RATE, duration=DURATION, dtype=np.float32, block_size=BLOCK_SIZE, engine="auto", amplitude=AMPLITUDE):
+    n_samples = int(sample_rate * duration)
+    blocks = stream_interference(freqs, sample_rate, duration, block_size, engine, amplitude)
+    write_stream(name, blocks, n_samples, sample_rate, dtype, peak=amplitude * len(freqs))
+
+def preset_key(freqs, sample_rate=SAMPLE_RATE, duration=DURATION, dtype=np.float32, amplitude=AMPLITUDE):
+    params = {
+        "freqs": [float(freq) for freq in freqs],
+        "amplitude": amplitude,
+        "sample_rate": sample_rate,
+        "duration": float(duration),
+        "dtype": np.dtype(dtype).name,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+def render_preset(path, freqs, sample_rate, duration, dtype, engine="auto", amplitude=AMPLITUDE):
+    write_interference(path, freqs, sample_rate, duration, dtype, engine=engine, amplitude=amplitude)
+    return path
+
+def render_all(presets=PRESETS, out_dir=".", sample_rate=SAMPLE_RATE, duration=DURATION, dtype=np.float32, engine="auto", workers=None, amplitude=AMPLITUDE):
+    # Render every preset whose file is missing or whose parameters hash differs
+    # from the one recorded in the manifest. Returns the names that were rendered.
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
 
-    # name = "waves2beat.wav"
-    # audio = interference([240, 242], t)
-    
-    # name = "waves3beat.wav"
-    # audio = interference([240, 242, 244], t)
+    keys = {name: preset_key(freqs, sample_rate, duration, dtype, amplitude) for name, freqs in presets.items()}
+    stale = [
+        name for name in presets
+        if manifest.get(name) != keys[name] or not os.path.exists(os.path.join(out_dir, name))
+    ]
+    if not stale:
+        return []
 
-    # name = "waves5beat.wav"
-    # audio = interference([240, 242, 244, 246, 248], t)
+    dtype = np.dtype(dtype).name
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_preset, os.path.join(out_dir, name), presets[name], sample_rate, duration, dtype, engine, amplitude): name
+            for name in stale
+        }
+        for future in as_completed(futures):
+            future.result()
+            # record each file as soon as it is done, so an interrupted batch
+            # does not redo the presets that already finished
+            manifest[futures[future]] = keys[futures[future]]
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+    return stale
 
-    # name = "waves20beat.wav"
-    # audio = interference([240 + i for i in range(0, 40, 2)], t)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Synthesize beat interference WAV files.")
+    parser.add_argument("preset", nargs="?", choices=sorted(PRESETS), help="preset to render (default: every preset)")
+    parser.add_argument("-o", "--output", help="output file for a single preset, output directory otherwise")
+    parser.add_argument("-r", "--rate", type=int, default=SAMPLE_RATE, help="sample rate in Hz")
+    parser.add_argument("-d", "--duration", type=float, default=DURATION, help="duration in seconds")
+    parser.add_argument("--dtype", choices=["float32", "int16"], default="float32")
+    parser.add_argument("--engine", choices=["auto", "direct", "fft"], default="auto")
+    parser.add_argument("-j", "--workers", type=int, help="process pool size when rendering every preset")
+    return parser.parse_args(argv)
 
-    # name = "waves50beat.wav"
-    # audio = interference([240 + i for i in range(0, 100, 2)], t)
-    
-    name = "waves101beat2.wav"
-    audio = interference([240 + i for i in range(0, 202, 2)], t)
+def main(argv=None):
+    args = parse_args(argv)
+    if args.preset:
+        path = args.output or args.preset
+        write_interference(path, PRESETS[args.preset], args.rate, args.duration, args.dtype, engine=args.engine)
+        print(f"rendered {path}")
+        return
 
-    write(name, SAMPLE_RATE, audio.astype(np.float32))
+    rendered = render_all(
+        out_dir=args.output or ".",
+        sample_rate=args.rate,
+        duration=args.duration,
+        dtype=args.dtype,
+        engine=args.engine,
+        workers=args.workers,
+    )
+    for name in rendered:
+        print(f"rendered {name}")
 
-main()
+if __name__ == "__main__":
+    main()
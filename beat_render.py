@@ -0,0 +1,313 @@
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import multiprocessing
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import manim
+from manim import config
+
+import beat_audio_gen
+from common import QUALITY_FLAGS, file_hash
+import manim_beat
+from manim_beat import AUDIO_DIR, BeatFrequency, audio_path, load_spec
+
+CACHE_DIR = Path("media") / "section_cache"
+CACHE_LIMIT = 2 * 2 ** 30
+MANIFEST = "render_manifest.json"
+
+def section_names(spec):
+    return [section["name"] for section in spec["sections"]]
+
+def render_section(section, quality, spec_path=None):
+    # Render one BeatFrequency section to its own movie (video and sound) and
+    # return its path. Runs in a pool worker, so config changes stay local.
+    spec = load_spec(spec_path)
+    config.quality = quality
+    config.output_file = f"{spec['name']}_{section}"
+    scene = BeatFrequency()
+    scene.spec = spec
+    scene.sections = (section,)
+    scene.render()
+    return Path(scene.renderer.file_writer.movie_file_path)
+
+def concatenate(movies, output):
+    # Join the section movies with ffmpeg's concat demuxer. Streams are copied,
+    # not re-encoded, so the result is lossless.
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is required to concatenate section movies")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as listing:
+        for movie in movies:
+            listing.write(f"file '{Path(movie).resolve()}'\n")
+    try:
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", listing.name, "-c", "copy", str(output)],
+            check=True,
+        )
+    finally:
+        Path(listing.name).unlink()
+    return Path(output)
+
+def local_sources(module, sources=None):
+    # Source of every module next to `module` that it imports, directly or
+    # through another such module, keyed by module name
+    sources = {} if sources is None else sources
+    root = Path(module.__file__).parent
+    for value in vars(module).values():
+        path = getattr(value, "__file__", None)
+        if inspect.ismodule(value) and path and Path(path).parent == root and value.__name__ not in sources:
+            sources[value.__name__] = inspect.getsource(value)
+            local_sources(value, sources)
+    return sources
+
+def shared_source():
+    # manim_beat's source without the section methods and without
+    # DEFAULT_SPEC, whose entries are hashed per section instead
+    source = inspect.getsource(manim_beat)
+    shared = source
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "DEFAULT_SPEC" for target in node.targets):
+            shared = shared.replace(ast.get_source_segment(source, node), "")
+    for name, method in inspect.getmembers(BeatFrequency, inspect.isfunction):
+        if name.startswith("section_"):
+            shared = shared.replace(inspect.getsource(method), "")
+    return shared
+
+def section_key(section, quality, spec=BeatFrequency.spec):
+    # Hash of everything a section's output depends on: its spec entry and
+    # the spec's global settings, the code of its section method, the code
+    # it shares with other sections (helpers and class constants), the local
+    # modules it imports (beat_audio_gen computes every graph), the render
+    # quality and the WAV content. Editing one section's spec entry or method
+    # invalidates only that section; editing shared code invalidates them all.
+    entry = {s["name"]: s for s in spec["sections"]}[section]
+
+    audio = entry.get("audio") and audio_path(entry["audio"])
+    inputs = {
+        "section": entry,
+        "spec": {key: value for key, value in spec.items() if key != "sections"},
+        "code": inspect.getsource(getattr(BeatFrequency, f"section_{entry['kind']}")),
+        "shared": shared_source(),
+        "modules": local_sources(manim_beat),
+        "colors": {name: str(color) for name, color in BeatFrequency.COLORS.items()},
+        "quality": manim.constants.QUALITIES[quality],
+        "audio": file_hash(audio) if audio and Path(audio).exists() else None,
+        "manim": manim.__version__,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+class SectionCache:
+    # Rendered section movies (frames and positioned sound) stored under their
+    # section_key, with least-recently-used eviction above a size limit
+    def __init__(self, directory=CACHE_DIR, limit=CACHE_LIMIT):
+        self.directory = Path(directory)
+        self.limit = limit
+        self.index_path = self.directory / "index.json"
+        self.index = {}
+        if self.index_path.exists():
+            self.index = json.loads(self.index_path.read_text())
+        self.hits = []
+        self.misses = []
+
+    def path(self, key):
+        return self.directory / f"{key}.mp4"
+
+    def get(self, key, section):
+        if key in self.index and self.path(key).exists():
+            self.index[key]["last_used"] = time.time()
+            self.hits.append(section)
+            return self.path(key)
+        self.misses.append(section)
+        return None
+
+    def put(self, key, section, movie):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(movie, self.path(key))
+        self.index[key] = {
+            "section": section,
+            "size": self.path(key).stat().st_size,
+            "last_used": time.time(),
+        }
+        return self.path(key)
+
+    def evict(self):
+        # Drop least recently used entries until the cache fits its limit
+        evicted = []
+        entries = sorted(self.index.items(), key=lambda item: item[1]["last_used"])
+        total = sum(entry["size"] for _, entry in entries)
+        for key, entry in entries:
+            if total <= self.limit:
+                break
+            self.path(key).unlink(missing_ok=True)
+            del self.index[key]
+            total -= entry["size"]
+            evicted.append(entry["section"])
+        return evicted
+
+    def save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path.write_text(json.dumps(self.index, indent=2, sort_keys=True))
+
+    def report(self):
+        size = sum(entry["size"] for entry in self.index.values())
+        return (
+            f"section cache: {len(self.hits)} hits ({', '.join(self.hits) or '-'}), "
+            f"{len(self.misses)} misses ({', '.join(self.misses) or '-'}), "
+            f"{len(self.index)} entries, {size / 2 ** 20:.1f} MiB of {self.limit / 2 ** 20:.0f} MiB"
+        )
+
+def render_parallel(sections=None, quality="high_quality", output="BeatFrequency.mp4", workers=None, cache=None, spec_path=None):
+    # Sections found in the cache are reused as they are, the rest are
+    # rendered on a process pool and stored before everything is joined
+    spec = load_spec(spec_path)
+    sections = sections or section_names(spec)
+    ensure_audio(spec)
+    keys = {section: section_key(section, quality, spec) for section in sections}
+    movies = {}
+    if cache is not None:
+        for section in sections:
+            movie = cache.get(keys[section], section)
+            if movie is not None:
+                movies[section] = movie
+
+    missing = [section for section in sections if section not in movies]
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = pool.map(render_section, missing, [quality] * len(missing), [spec_path] * len(missing))
+            for section, movie in zip(missing, rendered):
+                movies[section] = movie if cache is None else cache.put(keys[section], section, movie)
+
+    output = concatenate([movies[section] for section in sections], output)
+    if cache is not None:
+        cache.evict()
+        cache.save()
+    return output
+
+def spec_audio(spec):
+    # WAV file -> (tone frequencies, amplitude) for every section of the spec
+    # with sound
+    return {
+        section["audio"]: (
+            [spec["label_base_freq"] + spec["spacing"] * k for k in range(section["waves"])],
+            spec["amplitude"],
+        )
+        for section in spec["sections"]
+        if section.get("audio")
+    }
+
+def ensure_audio(*specs):
+    # Synthesize the WAV files the specs refer to into AUDIO_DIR, leaving the
+    # committed ones alone. render_all's manifest decides which are stale, so
+    # a file left by a spec with other tones is rendered again, not reused.
+    presets = {}
+    for spec in specs:
+        for name, tones in spec_audio(spec).items():
+            if presets.setdefault(name, tones) != tones:
+                raise ValueError(f"{name} is used for different tones by {spec['name']} and another spec")
+    # render_all takes one amplitude per call
+    by_amplitude = {}
+    for name, (freqs, amplitude) in presets.items():
+        by_amplitude.setdefault(amplitude, {})[name] = freqs
+    if by_amplitude:
+        Path(AUDIO_DIR).mkdir(parents=True, exist_ok=True)
+    for amplitude, group in by_amplitude.items():
+        beat_audio_gen.render_all(group, AUDIO_DIR, amplitude=amplitude)
+
+def precompute(spec, quality):
+    # Evaluate the interference samples of every comb section up front. Pool
+    # workers forked afterwards inherit them, along with the imported modules.
+    config.quality = quality
+    scene = object.__new__(BeatFrequency)
+    scene.apply_spec(spec)
+    axes = scene.create_axes("center")
+    for section in spec["sections"]:
+        if section["kind"] == "comb":
+            scene.interference_samples(axes, scene.comb_freqs(section["waves"]))
+
+def render_spec(spec_path, quality):
+    start = time.perf_counter()
+    spec = load_spec(spec_path)
+    config.quality = quality
+    config.output_file = spec["name"]
+    scene = BeatFrequency()
+    scene.spec = spec
+    scene.render()
+    return {
+        "spec": str(spec_path),
+        "name": spec["name"],
+        "output": str(scene.renderer.file_writer.movie_file_path),
+        "seconds": time.perf_counter() - start,
+    }
+
+def render_specs(spec_paths, quality="high_quality", workers=None, manifest=MANIFEST):
+    # Render whole scenes from many spec files on a process pool and write a
+    # manifest of outputs and timings
+    start = time.perf_counter()
+    specs = [load_spec(spec_path) for spec_path in spec_paths]
+    ensure_audio(*specs)
+    for spec in specs:
+        precompute(spec, quality)
+
+    context = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        renders = list(pool.map(render_spec, spec_paths, [quality] * len(spec_paths)))
+
+    report = {
+        "quality": quality,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seconds": time.perf_counter() - start,
+        "renders": renders,
+    }
+    with open(manifest, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render BeatFrequency sections in parallel and join them.")
+    parser.add_argument("sections", nargs="*", metavar="section",
+                        help="sections of the spec to render, in order (default: all)")
+    parser.add_argument("-q", "--quality", choices=QUALITY_FLAGS, default="h")
+    parser.add_argument("-o", "--output", default="BeatFrequency.mp4")
+    parser.add_argument("-j", "--workers", type=int, help="process pool size (default: CPU count)")
+    parser.add_argument("--spec", help="scene spec (JSON or TOML) to render instead of the default")
+    parser.add_argument("--batch", nargs="+", metavar="SPEC",
+                        help="render each spec as a whole scene and write a manifest instead")
+    parser.add_argument("--manifest", default=MANIFEST)
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR))
+    parser.add_argument("--cache-limit", type=float, default=CACHE_LIMIT / 2 ** 20, help="cache size limit in MiB")
+    parser.add_argument("--no-cache", action="store_true", help="render every section, ignoring the cache")
+    args = parser.parse_args(argv)
+    unknown = set(args.sections) - set(section_names(load_spec(args.spec)))
+    if unknown:
+        parser.error(f"unknown sections: {', '.join(sorted(unknown))}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.batch:
+        report = render_specs(args.batch, QUALITY_FLAGS[args.quality], args.workers, args.manifest)
+        for render in report["renders"]:
+            print(f"{render['name']}: {render['output']} ({render['seconds']:.1f} s)")
+        print(f"wrote {args.manifest}")
+        return
+
+    cache = None if args.no_cache else SectionCache(args.cache_dir, int(args.cache_limit * 2 ** 20))
+    output = render_parallel(args.sections, QUALITY_FLAGS[args.quality], args.output, args.workers, cache, args.spec)
+    if cache is not None:
+        print(cache.report())
+    print(f"wrote {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+import beat_audio_gen
+from common import git_commit, peak_rss
+
+TONES = [2, 5, 20, 50, 101, 200, 500, 1000]
+RATES = [44100, 100000]
+DURATIONS = [1, 4]
+ENGINES = ["interference", "evaluate", "direct", "fft", "scene"]
+BASE_FREQ = 240
+SPACING = 2
+# the interference engine is skipped once tones x samples x 8 bytes exceeds this
+MEMORY_BUDGET = 2 ** 30
+
+def comb(n_tones):
+    return [BASE_FREQ + SPACING * k for k in range(n_tones)]
+
+def engine_function(engine):
+    if engine == "interference":
+        def run(freqs, sample_rate, duration):
+            t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+            return beat_audio_gen.interference(freqs, t)
+    elif engine == "evaluate":
+        def run(freqs, sample_rate, duration):
+            t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+            return beat_audio_gen.evaluate_interference(freqs, t)
+    elif engine == "scene":
+        # evaluate_interference as the scene calls it, which needs manim.
+        # BeatFrequency only needs class attributes for interference(), so an
+        # uninitialized instance avoids setting up a renderer
+        import manim_beat
+        scene = object.__new__(manim_beat.BeatFrequency)
+
+        def run(freqs, sample_rate, duration):
+            t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+            return scene.interference(freqs, t)
+    else:
+        def run(freqs, sample_rate, duration):
+            return beat_audio_gen.synthesize(freqs, sample_rate, duration, engine=engine)
+    return run
+
+def measure(engine, n_tones, sample_rate, duration, repeat):
+    # Runs in a fresh worker process, so peak RSS belongs to this point alone
+    point = {
+        "engine": engine,
+        "tones": n_tones,
+        "sample_rate": sample_rate,
+        "duration": duration,
+        "samples": int(sample_rate * duration),
+    }
+    freqs = comb(n_tones)
+    # only the reference list-sum holds every tone at once; evaluate (and the
+    # scene engine) is chunked, and closed-form for these evenly spaced combs
+    if engine == "interference" and n_tones * point["samples"] * 8 > MEMORY_BUDGET:
+        return dict(point, skipped="over memory budget")
+    if engine == "fft" and beat_audio_gen.fft_period(freqs, sample_rate) is None:
+        return dict(point, skipped="no FFT bin grid")
+    try:
+        run = engine_function(engine)
+    except ImportError as e:
+        return dict(point, skipped=str(e))
+
+    rss_before = peak_rss()
+    tracemalloc.start()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(freqs, sample_rate, duration)
+        times.append(time.perf_counter() - start)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(times)
+    return dict(
+        point,
+        wall_time=best,
+        samples_per_second=point["samples"] / best,
+        tracemalloc_peak=traced_peak,
+        peak_rss=peak_rss(),
+        peak_rss_growth=peak_rss() - rss_before,
+    )
+
+def run_suite(engines, tones, rates, durations, repeat=3):
+    points = [
+        (engine, n_tones, rate, duration)
+        for rate in rates
+        for duration in durations
+        for n_tones in tones
+        for engine in engines
+    ]
+    # one task per process: ru_maxrss is a high-water mark and never goes down
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for point in points:
+            result = pool.apply(measure, (*point, repeat))
+            results.append(result)
+            print(format_result(result), flush=True)
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "results": results,
+    }
+
+def format_result(result):
+    name = f"{result['engine']:>12} {result['tones']:>5} tones {result['sample_rate']:>6} Hz {result['duration']:>4} s"
+    if "skipped" in result:
+        return f"{name}  skipped ({result['skipped']})"
+    return (
+        f"{name}  {result['wall_time'] * 1e3:9.2f} ms"
+        f"  {result['samples_per_second'] / 1e6:8.2f} MS/s"
+        f"  {result['tracemalloc_peak'] / 2 ** 20:8.1f} MiB traced"
+        f"  {result['peak_rss'] / 2 ** 20:8.1f} MiB RSS"
+    )
+
+def compare(baseline, current):
+    # Print current / baseline wall time for every point present in both runs
+    def key(result):
+        return (result["engine"], result["tones"], result["sample_rate"], result["duration"])
+
+    old = {key(r): r for r in baseline["results"] if "wall_time" in r}
+    print(f"\ncompared with {baseline.get('commit')} (ratio > 1 is slower)")
+    for result in current["results"]:
+        if "wall_time" in result and key(result) in old:
+            ratio = result["wall_time"] / old[key(result)]["wall_time"]
+            print(f"{format_result(result)}  x{ratio:.2f}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark beat interference synthesis.")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--tones", nargs="+", type=int, default=TONES)
+    parser.add_argument("--rates", nargs="+", type=int, default=RATES)
+    parser.add_argument("--durations", nargs="+", type=float, default=DURATIONS)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per point, the fastest is kept")
+    parser.add_argument("-o", "--output", help="JSON results file (default: bench_audio-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_suite(args.engines, args.tones, args.rates, args.durations, args.repeat)
+
+    output = args.output or f"bench_audio-{report['commit'] or 'local'}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
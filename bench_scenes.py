@@ -0,0 +1,146 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import manim
+from manim import config
+
+from common import QUALITY_FLAGS, git_commit, peak_rss
+from render_profile import SCENE_MODULES, scene_classes
+
+# floor-cost reference: one static dot, so its time is pure manim/ffmpeg overhead
+REFERENCE = "TestDot"
+THRESHOLD = 0.1
+
+def render_scene(target, quality):
+    # Runs in a fresh interpreter, so peak RSS belongs to this scene alone
+    (cls,) = scene_classes(target)
+    config.quality = QUALITY_FLAGS[quality]
+    config.verbosity = "WARNING"
+    # cached partial movies would skip rendering entirely
+    config.disable_caching = True
+    start = time.perf_counter()
+    scene = cls()
+    scene.render()
+    wall_time = time.perf_counter() - start
+    frames = round(scene.renderer.time * config.frame_rate)
+    return {
+        "scene": cls.__name__,
+        "target": target,
+        "wall_time": wall_time,
+        "frames": frames,
+        "fps": frames / wall_time,
+        "peak_rss": peak_rss(),
+    }
+
+def measure(target, quality, repeat):
+    runs = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, __file__, "--worker", target, "-q", quality],
+            capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines() or [f"exit code {process.returncode}"]
+            return {"target": target, "scene": target.partition(":")[2], "failed": error[-1]}
+        runs.append(json.loads(process.stdout.splitlines()[-1]))
+    best = min(runs, key=lambda run: run["wall_time"])
+    return dict(best, peak_rss=max(run["peak_rss"] for run in runs))
+
+def run_suite(targets, quality, repeat=1):
+    results = []
+    for target in targets:
+        result = measure(target, quality, repeat)
+        results.append(result)
+        print(format_result(result), flush=True)
+
+    reference = next((r for r in results if r["scene"] == REFERENCE and "wall_time" in r), None)
+    if reference is not None:
+        for result in results:
+            if "wall_time" in result:
+                result["relative_to_reference"] = result["wall_time"] / reference["wall_time"]
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "manim": manim.__version__,
+        "quality": QUALITY_FLAGS[quality],
+        "results": results,
+    }
+
+def format_result(result):
+    name = f"{result['scene']:>20}"
+    if "failed" in result:
+        return f"{name}  failed ({result['failed']})"
+    return (
+        f"{name}  {result['wall_time']:8.2f} s  {result['frames']:5} frames"
+        f"  {result['fps']:7.1f} frames/s  {result['peak_rss'] / 2 ** 20:8.1f} MiB RSS"
+    )
+
+def compare(baseline, current, threshold=THRESHOLD):
+    # Print current / baseline wall time per scene and return the scenes slower
+    # than the baseline by more than the threshold. The ratio against the
+    # reference scene is shown too: when every scene moved by the same factor as
+    # TestDot, the machine changed rather than the scene code.
+    old = {r["scene"]: r for r in baseline["results"] if "wall_time" in r}
+    print(f"\ncompared with {baseline.get('commit')} (ratio > 1 is slower, threshold {threshold:.0%})")
+    regressions = []
+    for result in current["results"]:
+        if "wall_time" not in result or result["scene"] not in old:
+            continue
+        before = old[result["scene"]]
+        ratio = result["wall_time"] / before["wall_time"]
+        line = f"{format_result(result)}  x{ratio:.2f}"
+        if "relative_to_reference" in result and "relative_to_reference" in before:
+            line += f"  (x{result['relative_to_reference'] / before['relative_to_reference']:.2f} vs {REFERENCE})"
+        if ratio > 1 + threshold:
+            regressions.append(result["scene"])
+            line += "  REGRESSION"
+        print(line)
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless renders of every scene.")
+    parser.add_argument("targets", nargs="*", metavar="module[:Scene]",
+                        help="scene modules or single scenes (default: every scene in every module)")
+    parser.add_argument("-q", "--quality", choices=QUALITY_FLAGS, default="l")
+    parser.add_argument("--repeat", type=int, default=1, help="renders per scene, the fastest is kept")
+    parser.add_argument("-o", "--output", help="JSON results file (default: bench_scenes-<commit>.json)")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown over the baseline reported as a regression (default: 0.1 = 10%%)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        print(json.dumps(render_scene(args.worker, args.quality)))
+        return
+
+    targets = [
+        f"{cls.__module__}:{cls.__name__}"
+        for target in args.targets or SCENE_MODULES
+        for cls in scene_classes(target)
+    ]
+    # the reference scene first, so it is not measured on a warmer machine
+    targets.sort(key=lambda target: not target.endswith(f":{REFERENCE}"))
+    report = run_suite(targets, args.quality, args.repeat)
+
+    output = args.output or f"bench_scenes-{report['commit'] or 'local'}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
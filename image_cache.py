@@ -0,0 +1,53 @@
+import hashlib
+import math
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from manim import ImageMobject, config
+from manim.constants import DEFAULT_QUALITY, QUALITIES
+from manim.utils.images import get_full_raster_image_path
+
+from common import file_hash
+
+CACHE_DIR = Path("media") / "image_cache"
+# ImageMobject's default: an image this many pixels tall fills the frame height
+SCALE_TO_RESOLUTION = QUALITIES[DEFAULT_QUALITY]["pixel_height"]
+
+def screen_height(pixel_height, scale, max_scale=None):
+    # Pixels the image covers at the active quality when shown at its largest,
+    # never more than the source has
+    shown = pixel_height / SCALE_TO_RESOLUTION * (max_scale or scale) * config.pixel_height
+    return min(pixel_height, math.ceil(shown))
+
+def downscaled_pixels(path, height, cache_dir=CACHE_DIR):
+    # RGBA pixels of the image resampled to `height` rows, cached on disk as
+    # .npy under the source content and target size
+    path = get_full_raster_image_path(path)
+    key = hashlib.sha256(f"{file_hash(path)}:{height}:lanczos".encode()).hexdigest()
+    cached = Path(cache_dir) / f"{key}.npy"
+    if cached.exists():
+        return np.load(cached)
+
+    image = Image.open(path).convert("RGBA")
+    width = max(1, round(image.width * height / image.height))
+    if height < image.height:
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    pixels = np.asarray(image)
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    np.save(cached, pixels)
+    return pixels
+
+def scaled_image(path, scale=1, max_scale=None, **kwargs):
+    # Same on-screen size as ImageMobject(path).scale(scale), but backed by a
+    # bitmap no larger than what the active quality can show, so compositing
+    # every frame resamples a few hundred rows instead of the full source.
+    # max_scale is the largest scale the image reaches later in the scene.
+    with Image.open(get_full_raster_image_path(path)) as image:
+        source_height = image.height
+    height = screen_height(source_height, scale, max_scale)
+    pixels = downscaled_pixels(path, height)
+    # scale_to_resolution shrinks with the bitmap so its size is unchanged
+    resolution = SCALE_TO_RESOLUTION * pixels.shape[0] / (source_height * scale)
+    return ImageMobject(pixels, scale_to_resolution=resolution, **kwargs)
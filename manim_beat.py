@@ -6,6 +6,109 @@ from manim.utils.color import color_to_rgb, rgb_to_color
 from manim.utils.color.XKCD import BLUEGREEN
 
 import colorsys
+import json
+import os
+
+from pydub import AudioSegment
+
+import beat_audio_gen
+
+
+# Default scene spec. Spec files (JSON or TOML) override any of these keys;
+# each section is rendered by the section_<kind> method of BeatFrequency.
+# A comb's stroke_offset is added to the spec's stroke; without one the
+# graph keeps manim's default width.
+DEFAULT_SPEC = {
+    "name": "BeatFrequency",
+    "base_freq": 30,
+    "spacing": 2,
+    "label_base_freq": 240,
+    "amplitude": 1,
+    "x_max": 2,
+    "sections": [
+        {"name": "waves2", "kind": "two_waves", "waves": 2, "audio": "waves2beat.wav"},
+        {"name": "waves3", "kind": "three_waves", "waves": 3, "audio": "waves3beat.wav"},
+        {"name": "waves5", "kind": "comb", "waves": 5, "y_max": 6, "step": 1,
+         "intro": "create", "font_size": 28, "audio": "waves5beat.wav"},
+        {"name": "waves20", "kind": "comb", "waves": 20, "y_max": 25, "step": 5,
+         "stroke_offset": 0.75, "font_size": 28, "audio": "waves20beat.wav"},
+        {"name": "waves50", "kind": "comb", "waves": 50, "y_max": 50, "step": 10,
+         "stroke_offset": 0.25, "audio": "waves50beat.wav"},
+        {"name": "waves101", "kind": "comb", "waves": 101, "y_max": 90, "step": 20,
+         "stroke_offset": -0.5, "audio": "waves101beat.wav", "final_wait": 3},
+    ],
+}
+
+# WAV files synthesized by beat_render for the specs' sections
+AUDIO_DIR = os.path.join("media", "beat_audio")
+
+# spec key -> BeatFrequency attribute it overrides
+SPEC_ATTRIBUTES = {
+    "base_freq": "BASE_FREQ",
+    "spacing": "SPACING",
+    "label_base_freq": "LABEL_BASE_FREQ",
+    "amplitude": "AMPLITUDE",
+    "x_min": "X_MIN",
+    "x_max": "X_MAX",
+    "stroke": "STROKE",
+}
+
+
+def load_spec(path=None):
+    # Read a JSON or TOML scene spec on top of DEFAULT_SPEC
+    if path is None:
+        return DEFAULT_SPEC
+    if str(path).endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise RuntimeError(f"reading {path} needs Python 3.11 or later (tomllib); use a JSON spec instead")
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+    else:
+        with open(path, "rb") as f:
+            spec = json.load(f)
+    return {**DEFAULT_SPEC, **spec}
+
+
+def audio_path(name):
+    # The copy synthesized into AUDIO_DIR if there is one, otherwise the WAV
+    # file of that name shipped next to the scenes
+    generated = os.path.join(AUDIO_DIR, name)
+    return generated if os.path.exists(generated) else name
+
+
+class SweptCurve(VMobject):
+    # Partial copy of a full graph, revealed from its start up to a proportion.
+    # A multi-colour stroke gradient stays pinned to the full graph's horizontal
+    # extent, so each colour stop keeps its x position however much is shown.
+    def __init__(self, graph, **kwargs):
+        super().__init__(**kwargs)
+        self.graph = graph
+        self.match_style(graph)
+        self.set_progress(0)
+
+    def set_progress(self, alpha):
+        self.pointwise_become_partial(self.graph, 0, np.clip(alpha, 0, 1))
+        return self
+
+    def get_gradient_start_and_end_points(self):
+        return self.graph.get_left(), self.graph.get_right()
+
+
+class TraceEnd(Animation):
+    # Keeps a dot on the growing end of a curve drawn by Create with the same
+    # run_time and rate_func. The end point is read from the curve's Bezier
+    # segments by progress, so it costs O(1) per frame at any curve density.
+    # The points are copied, since Create rewrites the curve while it plays.
+    def __init__(self, dot, curve, **kwargs):
+        self.curves = curve.points.reshape(-1, curve.n_points_per_cubic_curve, 3).copy()
+        super().__init__(dot, **kwargs)
+
+    def interpolate_mobject(self, alpha):
+        index, residue = integer_interpolate(0, len(self.curves), self.rate_func(alpha))
+        self.mobject.move_to(bezier(self.curves[index])(residue))
+
 
 class BeatFrequency(Scene):
     COLORS = {
@@ -21,7 +124,26 @@ class BeatFrequency(Scene):
     X_MIN = 0
     AMPLITUDE = 1
     BASE_FREQ = 30
+    SPACING = 2
+    # frequency written in the wave labels, i.e. the one heard in the audio
+    LABEL_BASE_FREQ = 240
     STROKE = 2
+    STEP_SIZE = 0.005
+    # BEAT_SPEC=variant.json renders another spec with the manim CLI
+    spec = load_spec(os.environ.get("BEAT_SPEC"))
+    # BEAT_SECTIONS=waves20,waves50 renders a subset of the spec's sections
+    sections = tuple(filter(None, os.environ.get("BEAT_SECTIONS", "").split(",")))
+    HSL_STEPS = 256
+    # samples per period of the highest frequency in a plotted trace
+    SAMPLES_PER_PERIOD = 32
+    # (from colour, to colour, steps) -> list of interpolated colours
+    hsl_luts = {}
+    # (colours, size, strips) -> legend template handed out as copies
+    legends = {}
+    # (freqs, amplitude, x range, pixel columns, density) -> (t, y) samples
+    interference_samples_cache = {}
+    # (text, font size, colour, font) -> glyph outlines handed out as copies
+    text_labels = {}
 
     def create_axes(
         self,
@@ -53,48 +175,90 @@ class BeatFrequency(Scene):
         return axes
 
     def define_wave(self, amplitude, frequency):
-        return lambda t: amplitude * np.sin(2 * PI * frequency * t)
+        return beat_audio_gen.define_wave(amplitude, frequency)
 
     def interference(self, freqs, t):
-        return np.sum([self.define_wave(self.AMPLITUDE, freq)(t) for freq in freqs], axis=0)
+        return beat_audio_gen.evaluate_interference(freqs, t, self.AMPLITUDE)
+
+    def setup(self):
+        self.apply_spec(self.spec)
+        self.prepare_labels(self.spec_labels())
+
+    def apply_spec(self, spec):
+        # Spec values shadow the class defaults on this instance only
+        for key, attribute in SPEC_ATTRIBUTES.items():
+            if key in spec:
+                setattr(self, attribute, spec[key])
+        self.COLORS = {**self.COLORS, **spec.get("colors", {})}
+
+    def spec_labels(self):
+        # (text, font size, colour) of the labels the spec's sections create
+        labels = [
+            ("Constructive", 20, self.COLORS["constructive"]),
+            ("Destructive", 20, self.COLORS["destructive"]),
+        ]
+        for section in self.spec["sections"]:
+            waves = section["waves"]
+            if section["kind"] == "comb":
+                labels.append((f"{waves} Waves - Interference", section.get("font_size", 24), self.COLORS["interference"]))
+                continue
+            labels.append((f"{waves} Wave Interference", 24, self.COLORS["interference"]))
+            for k in range(waves):
+                labels.append((self.freq_label(k), 24 if k == 1 else 28, self.COLORS[f"wave{k + 1}"]))
+        return labels
 
     def construct(self):
-        # step size for wave
-        step_size = 0.005
-
+        sections = {section["name"]: section for section in self.spec["sections"]}
+        for name in self.sections or sections:
+            section = sections[name]
+            getattr(self, f"section_{section['kind']}")(section)
+            # Each section fades out what it put on screen, so a section
+            # rendered on its own ends with the same frames as in the full scene
+            self.clear_screen()
+        self.pad_audio()
+
+    def comb_freqs(self, waves):
+        return [self.BASE_FREQ + self.SPACING * k for k in range(waves)]
+
+    def freq_label(self, k):
+        return f"{self.LABEL_BASE_FREQ + self.SPACING * k:g} Hz"
+
+    def section_two_waves(self, section):
         ## 2 waves beat interference
 
         # Create axes
         axes_wave1 = self.create_axes(UP, buff=1.3)
         axes_wave2 = self.create_axes(DOWN)
-        axes_bottom = self.create_axes(DOWN, labels=True)
+        axes_bottom = self.create_axes(DOWN, labels=True, y_max=section.get("y_max", 2.5))
 
         # Define sine wave functions
-        wave1 = self.define_wave(self.AMPLITUDE, self.BASE_FREQ)
-        wave2 = self.define_wave(self.AMPLITUDE, self.BASE_FREQ + 2)
+        wave1, wave2 = (
+            self.define_wave(self.AMPLITUDE, freq) for freq in self.comb_freqs(2)
+        )
 
         # Create wave graphs
-        wave1_graph = axes_wave1.plot(
-            lambda t: wave1(t),
+        wave1_graph = self.plot_function(
+            axes_wave1,
+            wave1,
             color=self.COLORS["wave1"],
-            x_range=[0, self.X_MAX, step_size],
+            x_range=[0, self.X_MAX, self.STEP_SIZE],
         )
-        wave2_graph = axes_wave2.plot(
-            lambda t:
-            wave2(t),
+        wave2_graph = self.plot_function(
+            axes_wave2,
+            wave2,
             color=self.COLORS["wave2"],
-            x_range=[0, self.X_MAX, step_size],
+            x_range=[0, self.X_MAX, self.STEP_SIZE],
         )
 
         # Add labels
         wave1_label = self.create_label(
-            "240 Hz",
+            self.freq_label(0),
             axes_wave1,
             self.COLORS["wave1"],
             font_size=28
         )
         wave2_label = self.create_label(
-            "242 Hz",
+            self.freq_label(1),
             axes_wave2,
             self.COLORS["wave2"]
         )
@@ -104,60 +268,8 @@ class BeatFrequency(Scene):
             self.COLORS["interference"],
             shift_h=RIGHT*1 + UP*0.2,
         )
-        
-
-        def get_legend_rectangle(height=0.33, width=2.5, num_strips=50, eps=0.00):
-            # Define the number of strips (more strips = smoother gradient)
-            strip_width = (width / num_strips) + eps
-    
-            # Define the start and end colors
-            left_color = self.COLORS["constructive"]
-            right_color = self.COLORS["destructive"]
-            strips = VGroup()
-
-            for i in range(num_strips):
-                # Calculate alpha (goes from 0 to 1)
-                alpha = i / (num_strips - 1)
-                interp_color = self.interpolate_hsl(
-                    left_color,
-                    right_color,
-                    alpha
-                )
-                # Create a thin rectangle (strip) with the interpolated color
-                strip = Rectangle(
-                    width=strip_width,
-                    height=height,
-                    fill_color=interp_color,
-                    fill_opacity=1,
-                    stroke_width=0
-                )
-                # Position each strip next to the previous one
-                # Starting from the left edge (-total_width/2)
-                strip.move_to(np.array([
-                    -width/2 + strip_width/2 + i * strip_width,
-                    0,
-                    0
-                ]))
-                strips.add(strip)
-
-
-            constructive_label = Text(
-                "Constructive",
-                font_size=20,
-                color=self.COLORS["constructive"]
-            ).move_to(strips.get_corner(UL) + UP * 0.3)
-
-            destructive_label = Text(
-                "Destructive",
-                font_size=20,
-                color=self.COLORS["destructive"]
-            ).move_to(strips.get_corner(UR) + UP * 0.3)
-
-            strips.add(constructive_label)
-            strips.add(destructive_label)
-            return strips
-
-        legend_rect = get_legend_rectangle()
+
+        legend_rect = self.create_legend()
         legend_rect.move_to(axes_wave1.get_top() + UP * 0.0 + LEFT * 2.5)
 
         # Animate individual waves
@@ -171,10 +283,11 @@ class BeatFrequency(Scene):
             FadeOut(axes_wave2, wave1_label, wave2_label),
             Transform(
                 wave2_graph,
-                axes_wave1.plot(
-                    lambda t: wave2(t),
+                self.plot_function(
+                    axes_wave1,
+                    wave2,
                     color=self.COLORS["wave2"],
-                    x_range=[0, self.X_MAX, step_size],
+                    x_range=[0, self.X_MAX, self.STEP_SIZE],
                 )
             )
         )
@@ -186,135 +299,62 @@ class BeatFrequency(Scene):
             Create(legend_rect),
         )
 
-        # Create dynamic waves and interference
-        dynamic_wave1 = VGroup()
-        dynamic_wave2 = VGroup()
-        dynamic_interference = VGroup()
-        for t in np.linspace(0, self.X_MAX, 200):
-            segment_wave1 = axes_wave1.plot(
-                lambda x: wave1(x),
-                x_range=[t, t + 0.01, 0.001],
-                color=self.get_color([wave1, wave2], t),
-            )
-            segment_wave2 = axes_wave1.plot(
-                lambda x: wave2(x),
-                x_range=[t, t + 0.01, 0.001],
-                color=self.get_color([wave1, wave2], t),
-            )
-            segment_interference = axes_bottom.plot(
-                lambda x: self.interference(
-                    [self.BASE_FREQ + i for i in range(0, 4, 2)], x
-                ),
-                x_range=[t, t + 0.01, 0.001],
-                color=self.COLORS["interference"],
-            )
-            dynamic_wave1.add(segment_wave1)
-            dynamic_wave2.add(segment_wave2)
-            dynamic_interference.add(segment_interference)
-
-        infer_dot, wave1_dot, wave2_dot = (
-            Dot(color=self.COLORS[i], radius=0.075)
-            for i in ("interference", "wave1", "wave2")
-        )
-        self.add(infer_dot, wave1_dot, wave2_dot)
-
-        # Animate dynamic waves and interference
-        for segment1, segment2, segment_interf in zip(dynamic_wave1, dynamic_wave2, dynamic_interference):
-            self.play(
-                Create(segment1),
-                Create(segment2),
-                Create(segment_interf),
-                MoveAlongPath(infer_dot, segment_interf),
-                MoveAlongPath(wave1_dot, segment1),
-                MoveAlongPath(wave2_dot, segment2),
-                run_time=0.02,
-                rate_func=linear
-            )
+        # Sweep the waves and their interference in one continuous animation
+        self.play_sweep(axes_wave1, [wave1, wave2], axes_bottom, self.comb_freqs(2))
         self.wait(2)
 
-        def add_vertical_line(audio_name, axes=axes_bottom):
-            vertical_line = Line(
-                axes.c2p(self.X_MIN+0.03, axes.y_range[0]),
-                axes.c2p(self.X_MIN+0.03, axes.y_range[1]),
-                color=WHITE,
-            )
-            self.play(Create(vertical_line))
-
-            # 1 second per tick
-            speed = (axes.c2p(1.05, 0) - axes.c2p(0, 0))
-            
-            def update_line(mob, dt):
-                mob.shift(RIGHT * speed * dt)
-                current_center = axes.p2c(mob.get_center())
-                if current_center[0] > self.X_MAX:
-                    mob.move_to(np.array([
-                        axes.c2p(self.X_MIN, 0)[0],
-                        mob.get_center()[1],
-                        mob.get_center()[2],
-                    ]))
-
-            vertical_line.add_updater(update_line)
-            self.add_sound(audio_name)
-
-            self.wait(4)
-
-            vertical_line.remove_updater(update_line)
-            self.play(FadeOut(vertical_line))
-
-        add_vertical_line("waves2beat.wav")
-
-        # Clear previous scene
-        self.play(
-            *[FadeOut(mob)for mob in self.mobjects]
-            # All mobjects in the screen are saved in self.mobjects
-        )
+        self.add_vertical_line(section.get("audio"), axes_bottom)
 
+    def section_three_waves(self, section):
         ## Begin 3 wave animation
 
         axes_wave1_original = self.create_axes(UP)
         axes_wave1 = self.create_axes(UP, buff=1.3, height=1.7)
         axes_wave2 = self.create_axes(ORIGIN, height=1.7)
         axes_wave3 = self.create_axes(DOWN, height=1.7)
-        axes_bottom = self.create_axes(DOWN, labels=True, y_max=3.5)
+        axes_bottom = self.create_axes(DOWN, labels=True, y_max=section.get("y_max", 3.5))
 
         # Define sine wave functions
-        wave1 = self.define_wave(self.AMPLITUDE, self.BASE_FREQ)
-        wave2 = self.define_wave(self.AMPLITUDE, self.BASE_FREQ + 2)
-        wave3 = self.define_wave(self.AMPLITUDE, self.BASE_FREQ + 4)
+        wave1, wave2, wave3 = (
+            self.define_wave(self.AMPLITUDE, freq) for freq in self.comb_freqs(3)
+        )
 
         # Create wave graphs
-        wave1_graph = axes_wave1.plot(
-            lambda t: wave1(t),
+        wave1_graph = self.plot_function(
+            axes_wave1,
+            wave1,
             color=self.COLORS["wave1"],
-            x_range=[0, self.X_MAX, step_size]
+            x_range=[0, self.X_MAX, self.STEP_SIZE]
         )
-        wave2_graph = axes_wave2.plot(
-            lambda t: wave2(t),
+        wave2_graph = self.plot_function(
+            axes_wave2,
+            wave2,
             color=self.COLORS["wave2"],
-            x_range=[0, self.X_MAX, step_size]
+            x_range=[0, self.X_MAX, self.STEP_SIZE]
         )
-        wave3_graph = axes_wave3.plot(
-            lambda t: wave3(t),
+        wave3_graph = self.plot_function(
+            axes_wave3,
+            wave3,
             color=self.COLORS["wave3"],
-            x_range=[0, self.X_MAX, step_size]
+            x_range=[0, self.X_MAX, self.STEP_SIZE]
         )
 
         # Add labels
         wave1_label = self.create_label(
-            "240 Hz",
+            self.freq_label(0),
             axes_wave1,
             self.COLORS["wave1"],
             corner=UL,
             font_size=28,
         )
         wave2_label = self.create_label(
-            "242 Hz",
+            self.freq_label(1),
             axes_wave2,
             self.COLORS["wave2"],
             corner=UL
         )
         wave3_label = self.create_label(
-            "244 Hz",
+            self.freq_label(2),
             axes_wave3,
             self.COLORS["wave3"],
             corner=UL,
@@ -340,25 +380,27 @@ class BeatFrequency(Scene):
             FadeOut(axes_wave2, axes_wave3, wave1_label, wave2_label, wave3_label),
             Transform(
                 wave2_graph,
-                axes_wave1.plot(
-                    lambda t: wave2(t),
+                self.plot_function(
+                    axes_wave1,
+                    wave2,
                     color=self.COLORS["wave2"],
-                    x_range=[0, self.X_MAX, step_size]
+                    x_range=[0, self.X_MAX, self.STEP_SIZE]
                 )
             ),
             Transform(
                 wave3_graph,
-                axes_wave1.plot(
-                    lambda t: wave3(t),
+                self.plot_function(
+                    axes_wave1,
+                    wave3,
                     color=self.COLORS["wave3"],
-                    x_range=[0, self.X_MAX, step_size]
+                    x_range=[0, self.X_MAX, self.STEP_SIZE]
                 )
             ),
         )
 
         self.wait(1)
 
-        legend_rect = get_legend_rectangle()
+        legend_rect = self.create_legend()
         legend_rect.move_to(axes_wave1.get_top() + UP * 0.1 + LEFT * 2.5)
 
         self.play(
@@ -367,304 +409,284 @@ class BeatFrequency(Scene):
             Transform(axes_wave1, axes_wave1_original),
             Transform(
                 wave1_graph,
-                axes_wave1_original.plot(
-                    lambda t: wave1(t),
+                self.plot_function(
+                    axes_wave1_original,
+                    wave1,
                     color=self.COLORS["wave1"],
-                    x_range=[0, self.X_MAX, step_size]
+                    x_range=[0, self.X_MAX, self.STEP_SIZE]
                 )
             ),
             Transform(
                 wave2_graph,
-                axes_wave1_original.plot(
-                    lambda t: wave2(t),
+                self.plot_function(
+                    axes_wave1_original,
+                    wave2,
                     color=self.COLORS["wave2"],
-                    x_range=[0, self.X_MAX, step_size]
+                    x_range=[0, self.X_MAX, self.STEP_SIZE]
                 )
             ),
             Transform(
                 wave3_graph,
-                axes_wave1_original.plot(
-                    lambda t: wave3(t),
+                self.plot_function(
+                    axes_wave1_original,
+                    wave3,
                     color=self.COLORS["wave3"],
-                    x_range=[0, self.X_MAX, step_size]
+                    x_range=[0, self.X_MAX, self.STEP_SIZE]
                 )
             ),
             Create(legend_rect),
         )
 
-        # Create dynamic waves and interference
-        dynamic_wave1 = VGroup()
-        dynamic_wave2 = VGroup()
-        dynamic_wave3 = VGroup()
-        dynamic_interference = VGroup()
-        for t in np.linspace(0, self.X_MAX, 200):
-            segment_wave1 = axes_wave1.plot(
-                lambda x: wave1(x),
-                x_range=[t, t + 0.01, 0.001],
-                color=self.get_color([wave1, wave2, wave3], t)
-            )
-            segment_wave2 = axes_wave1.plot(
-                lambda x: wave2(x),
-                x_range=[t, t + 0.01, 0.001],
-                color=self.get_color([wave1, wave2, wave3], t)
-            )
-            segment_wave3 = axes_wave1.plot(
-                lambda x: wave3(x),
-                x_range=[t, t + 0.01, 0.001],
-                color=self.get_color([wave1, wave2, wave3], t)
-            )
-            dynamic_wave1.add(segment_wave1)
-            dynamic_wave2.add(segment_wave2)
-            dynamic_wave3.add(segment_wave3)
-            segment_interference = axes_bottom.plot(
-                lambda x: self.interference(
-                    [self.BASE_FREQ + i for i in range(0, 3*2, 2)], x
-                ),
-                x_range=[t, t + 0.01, 0.001],
-                color=self.COLORS["interference"]
-            )
-            dynamic_interference.add(segment_interference)
-
-        infer_dot, wave1_dot, wave2_dot, wave3_dot = (
-            Dot(color=self.COLORS[i], radius=0.075)
-            for i in ("interference", "wave1", "wave2", "wave3")
-        )
-        self.add(infer_dot, wave1_dot, wave2_dot)
-
-        # Animate dynamic waves and interference
-        for segment1, segment2, segment3, segment_interf in zip(dynamic_wave1, dynamic_wave2, dynamic_wave3, dynamic_interference):
-            self.play(
-                Create(segment1),
-                Create(segment2),
-                Create(segment3),
-                Create(segment_interf),
-                MoveAlongPath(infer_dot, segment_interf),
-                MoveAlongPath(wave1_dot, segment1),
-                MoveAlongPath(wave2_dot, segment2),
-                MoveAlongPath(wave3_dot, segment3),
-                run_time=0.02,
-                rate_func=linear
-            )
+        # Sweep the waves and their interference in one continuous animation
+        self.play_sweep(axes_wave1, [wave1, wave2, wave3], axes_bottom, self.comb_freqs(3))
         self.wait(2)
 
-        add_vertical_line("waves3beat.wav")
-
-        
-        ## 5 Wave interference
-
-        # Clear previous scene
-        self.play(*[FadeOut(mob) for mob in self.mobjects])
+        self.add_vertical_line(section.get("audio"), axes_bottom)
 
-        # self.interactive_embed()
+    def section_comb(self, section):
+        ## N wave interference on a single plot
+        waves = section["waves"]
 
-        axes_5 = self.create_axes(
-            "center", 
-            height=5, 
-            labels=True, 
-            y_max=6,
-            step=1,
-        )
-
-        # Create wave graphs
-        axes_5_graph = axes_5.plot(
-            lambda t: self.interference(
-                [self.BASE_FREQ + i for i in range(0, 5*2, 2)], t
-            ),
-            color=self.COLORS["interference"],
-            x_range=[0, self.X_MAX, step_size]
-        )
-
-        dot_5 = Dot(color=self.COLORS["interference"], radius=0.075)
-
-        dot_5.add_updater(
-            lambda t: t.move_to(axes_5_graph.get_end()) # type: ignore
-        )
-
-        axes_5_label = self.create_label(
-            "5 Waves - Interference",
-            axes_5,
-            self.COLORS["interference"],
-            shift_h=RIGHT*0.9,
-            shift_v=UP*0.3,
-            font_size=28,
-        )
-
-        # Animate individual waves
-        self.play(Create(axes_5), Write(axes_5_label))
-
-        self.add(dot_5)
-        self.play(
-            Create(axes_5_graph),
-            run_time=1,
-            rate_func=linear
-        )
-
-        add_vertical_line("waves5beat.wav", axes=axes_5)
-
-        self.wait(1)
-
-
-        ## 20 Wave interference
-
-        axes_20 = self.create_axes(
+        axes = self.create_axes(
             "center",
             height=5,
             labels=True,
-            y_max=25,
-            step=5,
+            y_max=section["y_max"],
+            step=section["step"],
         )
 
-        self.play(
-            FadeOut(axes_5, axes_5_graph, axes_5_label, dot_5),
-            FadeIn(axes_20)
-        )
+        # Bring the axes in right away or after the label
+        if section.get("intro", "fade") == "fade":
+            self.play(FadeIn(axes))
 
         # Create wave graphs
-        axes_20_graph = axes_20.plot(
-            lambda t: self.interference(
-                [self.BASE_FREQ + i for i in range(0, 20*2, 2)], t
-            ),
+        stroke_width = DEFAULT_STROKE_WIDTH
+        if "stroke_offset" in section:
+            stroke_width = self.STROKE + section["stroke_offset"]
+        graph = self.plot_interference(
+            axes,
+            self.comb_freqs(waves),
             color=self.COLORS["interference"],
-            x_range=[0, self.X_MAX, step_size/10.],
-            stroke_width=self.STROKE+0.75,
+            stroke_width=stroke_width,
         )
 
-        dot_20 = Dot(color=self.COLORS["interference"], radius=0.075)
+        dot = Dot(color=self.COLORS["interference"], radius=0.075)
 
-        dot_20.add_updater(
-            lambda t: t.move_to(axes_20_graph.get_end()) # type: ignore
-        )
-
-        axes_20_label = self.create_label(
-            "20 Waves - Interference",
-            axes_20,
+        label = self.create_label(
+            f"{waves} Waves - Interference",
+            axes,
             self.COLORS["interference"],
             shift_h=RIGHT*0.9,
             shift_v=UP*0.3,
-            font_size=28,
+            font_size=section.get("font_size", 24),
         )
 
-        self.play(
-            Write(axes_20_label),
-        )
-
-        self.add(dot_20)
-        self.play(
-            Create(axes_20_graph),
-            run_time=1,
-            rate_func=linear
-        )
-
-        add_vertical_line("waves20beat.wav", axes=axes_20)
-
-        self.wait(1)
-
-        axes_50 = self.create_axes(
-            "center",
-            height=5,
-            labels=True,
-            y_max=50,
-            step=10,
-        )
-
-        self.play(
-            FadeOut(axes_20_graph, axes_20_label, dot_20, axes_20),
-            FadeIn(axes_50)
-        )
-
-        # Create wave graphs
-        axes_50_graph = axes_50.plot(
-            lambda t: self.interference(
-                [self.BASE_FREQ + i for i in range(0, 50*2, 2)], t
-            ),
-            color=self.COLORS["interference"],
-            x_range=[0, self.X_MAX, step_size/20.],
-            stroke_width=self.STROKE+0.25,
-        )
-
-        dot_50 = Dot(color=self.COLORS["interference"], radius=0.075)
-
-        dot_50.add_updater(
-            lambda t: t.move_to(axes_50_graph.get_end()) # type: ignore
-        )
-
-        axes_50_label = self.create_label(
-            "50 Waves - Interference",
-            axes_50,
-            self.COLORS["interference"],
-            shift_h=RIGHT*0.9,
-            shift_v=UP*0.3
-        )
-
-        # Animate individual waves
-        self.play(
-            Write(axes_50_label),
-        )
+        if section.get("intro", "fade") == "fade":
+            self.play(Write(label))
+        else:
+            self.play(Create(axes), Write(label))
 
-        self.add(dot_50)
         self.play(
-            Create(axes_50_graph),
+            Create(graph),
+            TraceEnd(dot, graph),
             run_time=1,
             rate_func=linear
         )
 
-        add_vertical_line("waves50beat.wav", axes=axes_50)
-
-        self.wait(1)
-
-
-        axes_101 = self.create_axes(
-            "center", 
-            height=5, 
-            labels=True, 
-            y_max=90,
-            step=20,
-        )
-
-        self.play(
-            FadeOut(axes_50, axes_50_graph, axes_50_label, dot_50),
-            FadeIn(axes_101)
-        )
-
-        # Create wave graphs
-        axes_101_graph = axes_101.plot(
-            lambda t: self.interference(
-                [self.BASE_FREQ + i for i in range(0, 101*2, 2)], t
-            ),
-            color=self.COLORS["interference"],
-            x_range=[0, self.X_MAX, step_size/100.],
-            stroke_width=self.STROKE-0.5,
-        )
-
-        dot_101 = Dot(color=self.COLORS["interference"], radius=0.075)
-
-        dot_101.add_updater(
-            lambda t: t.move_to(axes_101_graph.get_end()) # type: ignore
-        )
-
-        axes_101_label = self.create_label(
-            "101 Waves - Interference",
-            axes_101,
-            self.COLORS["interference"],
-            shift_h=RIGHT*0.9,
-            shift_v=UP*0.3
-        )
-
-        # Animate individual waves
-        self.play(
-            Write(axes_101_label)
-        )
+        self.add_vertical_line(section.get("audio"), axes)
+
+        self.wait(section.get("final_wait", 1))
+
+    def add_vertical_line(self, audio_name, axes):
+        vertical_line = Line(
+            axes.c2p(self.X_MIN+0.03, axes.y_range[0]),
+            axes.c2p(self.X_MIN+0.03, axes.y_range[1]),
+            color=WHITE,
+        )
+        self.play(Create(vertical_line))
+
+        # 1 second per tick: the position follows from the elapsed time,
+        # wrapping back to X_MIN at X_MAX, instead of accumulated shifts
+        speed = 1.05
+        start = self.X_MIN + 0.03
+        origin_x = axes.c2p(0, 0)[0]
+        unit_x = axes.c2p(1, 0)[0] - origin_x
+        elapsed = 0
+
+        def update_line(mob, dt):
+            nonlocal elapsed
+            elapsed += dt
+            x = self.X_MIN + (start - self.X_MIN + speed * elapsed) % (self.X_MAX - self.X_MIN)
+            mob.set_x(origin_x + unit_x * x)
+
+        vertical_line.add_updater(update_line)
+        if audio_name:
+            self.add_sound(audio_path(audio_name))
+
+        self.wait(4)
+
+        vertical_line.remove_updater(update_line)
+        self.play(FadeOut(vertical_line))
+
+    def clear_screen(self):
+        # Fade out everything on screen, if anything
+        if self.mobjects:
+            self.play(*[FadeOut(mob) for mob in self.mobjects])
+
+    def pad_audio(self):
+        # Extend the soundtrack with silence to the end of the video, so that
+        # section movies can be concatenated without the audio drifting. Every
+        # movie gets a track, silent sections included, in one format, since
+        # ffmpeg's concat demuxer copies streams and needs them to match.
+        file_writer = self.renderer.file_writer
+        file_writer.add_audio_segment(AudioSegment.silent(0), self.renderer.time)
+        file_writer.audio_segment = (
+            file_writer.audio_segment
+            .set_frame_rate(beat_audio_gen.SAMPLE_RATE)
+            .set_channels(1)
+            .set_sample_width(2)
+        )
+
+    def coords_to_points(self, axes, x, y):
+        # The axes are linear, so whole coordinate arrays map with one affine step
+        origin = axes.c2p(0, 0)
+        return (
+            origin
+            + np.outer(x, axes.c2p(1, 0) - origin)
+            + np.outer(y, axes.c2p(0, 1) - origin)
+        )
+
+    def plot_function(self, axes, func, x_range=None, smooth=True, **kwargs):
+        # Counterpart of axes.plot for vectorized functions: func is called once
+        # on the whole sample array and the graph is built from the result.
+        # Samples match axes.plot, including the smoothing it applies.
+        x_min, x_max, step = x_range or (self.X_MIN, self.X_MAX, 0.005)
+        t = np.append(np.arange(x_min, x_max, step), x_max)
+        graph = VMobject(**kwargs)
+        graph.set_points_as_corners(self.coords_to_points(axes, t, func(t)))
+        if smooth:
+            graph.make_smooth()
+        return graph
+
+    def pixel_columns(self, axes, x_min, x_max):
+        # Number of output pixel columns spanned by [x_min, x_max] on axes
+        width = axes.c2p(x_max, 0)[0] - axes.c2p(x_min, 0)[0]
+        return max(1, int(np.ceil(abs(width) * config.pixel_width / config.frame_width)))
+
+    def envelope(self, t, y, columns):
+        # Keep only the minimum and maximum of each pixel column, in the order
+        # they occur, plus both end points. len(t) must be a multiple of columns.
+        rows = y.reshape(columns, -1)
+        offsets = np.arange(columns)[:, None] * rows.shape[1]
+        extremes = np.sort(
+            np.stack([rows.argmin(axis=1), rows.argmax(axis=1)], axis=1), axis=1
+        ) + offsets
+        keep = np.unique(np.concatenate([[0], extremes.ravel(), [len(t) - 1]]))
+        return t[keep], y[keep]
+
+    def interference_samples(self, axes, freqs, x_range=None):
+        # Sampling density follows the highest frequency present. Anything
+        # denser than the output's pixel columns is reduced to a min/max
+        # envelope per column, so peaks survive and preview renders get cheaper.
+        # Results are memoized, so they can be computed ahead of rendering.
+        x_min, x_max = x_range or (self.X_MIN, self.X_MAX)
+        columns = self.pixel_columns(axes, x_min, x_max)
+        key = (tuple(freqs), self.AMPLITUDE, x_min, x_max, columns, self.SAMPLES_PER_PERIOD)
+        if key not in self.interference_samples_cache:
+            n_samples = int(np.ceil((x_max - x_min) * max(freqs) * self.SAMPLES_PER_PERIOD)) + 1
+            if n_samples > 2 * columns:
+                t = np.linspace(x_min, x_max, int(np.ceil(n_samples / columns)) * columns)
+                t, y = self.envelope(t, self.interference(freqs, t), columns)
+            else:
+                t = np.linspace(x_min, x_max, n_samples)
+                y = self.interference(freqs, t)
+            self.interference_samples_cache[key] = t, y
+        return self.interference_samples_cache[key]
+
+    def plot_interference(self, axes, freqs, x_range=None, **kwargs):
+        t, y = self.interference_samples(axes, freqs, x_range)
+        graph = VMobject(**kwargs)
+        graph.set_points_as_corners(self.coords_to_points(axes, t, y))
+        return graph
+
+    def create_legend(self, height=0.33, width=2.5, num_strips=50):
+        # The constructive-to-destructive scale is a single rectangle with a
+        # horizontal gradient fill rather than one rectangle per strip
+        left_color = self.COLORS["constructive"]
+        right_color = self.COLORS["destructive"]
+        key = (
+            ManimColor(left_color).to_hex(),
+            ManimColor(right_color).to_hex(),
+            height,
+            width,
+            num_strips,
+        )
+        if key not in self.legends:
+            gradient = Rectangle(width=width, height=height, stroke_width=0)
+            gradient.set_fill(
+                color=self.get_hsl_lut(left_color, right_color, num_strips),
+                opacity=1,
+            )
+            gradient.set_sheen_direction(RIGHT)
+
+            constructive_label = self.text_label("Constructive", 20, left_color)
+            constructive_label.move_to(gradient.get_corner(UL) + UP * 0.3)
+            destructive_label = self.text_label("Destructive", 20, right_color)
+            destructive_label.move_to(gradient.get_corner(UR) + UP * 0.3)
+
+            self.legends[key] = VGroup(gradient, constructive_label, destructive_label)
+        return self.legends[key].copy()
+
+    def play_sweep(self, wave_axes, waves, interference_axes, freqs, run_time=4, step=0.001):
+        # A single time tracker reveals each wave (coloured point by point by
+        # the local interference) and the interference trace, and moves a
+        # tracer dot along each of them, all within one play call
+        tracker = ValueTracker(self.X_MIN)
+        wave_colors = self.get_colors(
+            waves,
+            np.linspace(self.X_MIN, self.X_MAX, int(round((self.X_MAX - self.X_MIN) / step)) + 1),
+        )
+
+        def interference(t):
+            return self.interference(freqs, t)
+
+        tracks = [
+            (wave_axes, wave, wave_colors, self.COLORS[f"wave{i + 1}"])
+            for i, wave in enumerate(waves)
+        ]
+        tracks.append(
+            (interference_axes, interference, self.COLORS["interference"], self.COLORS["interference"])
+        )
+
+        curves = VGroup()
+        dots = VGroup()
+        for axes, func, stroke_color, dot_color in tracks:
+            graph = self.plot_function(axes, func, x_range=[self.X_MIN, self.X_MAX, step], smooth=False)
+            graph.set_stroke(color=stroke_color)
+            curve = SweptCurve(graph)
+            curve.add_updater(
+                lambda m: m.set_progress(
+                    (tracker.get_value() - self.X_MIN) / (self.X_MAX - self.X_MIN)
+                )
+            )
+            dot = Dot(color=dot_color, radius=0.075)
+            dot.add_updater(
+                lambda m, axes=axes, func=func: m.move_to(
+                    axes.c2p(tracker.get_value(), func(tracker.get_value()))
+                )
+            )
+            curves.add(curve)
+            dots.add(dot)
 
-        self.add(dot_101)
+        self.add(curves, dots)
         self.play(
-            Create(axes_101_graph),
-            run_time=1,
-            rate_func=linear
+            tracker.animate.set_value(self.X_MAX),
+            run_time=run_time,
+            rate_func=linear,
         )
-
-        add_vertical_line("waves101beat.wav", axes=axes_101)
-
-        self.wait(3)
+        curves.clear_updaters()
+        dots.clear_updaters()
+        return curves, dots
 
     def create_label(
         self,
@@ -676,16 +698,38 @@ class BeatFrequency(Scene):
         corner=UL,
         font_size=24,
     ):
-        return Text(
-            text,
-            font_size=font_size,
-            color=color
-        ).move_to(
+        return self.text_label(text, font_size, color).move_to(
             axes.get_corner(corner) + \
             (RIGHT * 1.5 + shift_h) + \
             (DOWN * 0.1 + shift_v)
         )
 
+    def label_key(self, text, font_size=24, color=WHITE, font=""):
+        return (text, font_size, ManimColor(color).to_hex(), font)
+
+    def prepare_labels(self, labels):
+        # Lay out every uncached (text, font size, colour[, font]) label, with
+        # one Paragraph per style, so Pango runs once per style rather than
+        # once per label. Each paragraph line becomes a cached label.
+        styles = {}
+        for label in labels:
+            key = self.label_key(*label)
+            if key not in self.text_labels:
+                styles.setdefault(key[1:], {})[key[0]] = key
+        for (font_size, color, font), keys in styles.items():
+            if len(keys) == 1:
+                lines = [Text(*keys, font_size=font_size, color=color, font=font)]
+            else:
+                lines = Paragraph(*keys, font_size=font_size, color=color, font=font).lines_chars
+            for key, line in zip(keys.values(), lines):
+                self.text_labels[key] = line
+
+    def text_label(self, text, font_size=24, color=WHITE, font=""):
+        key = self.label_key(text, font_size, color, font)
+        if key not in self.text_labels:
+            self.prepare_labels([key])
+        return self.text_labels[key].copy()
+
     def interpolate_hsl(self, color1, color2, alpha):
         # Convert the colors to RGB tuples in [0, 1]
         rgb1 = color_to_rgb(color1)
@@ -704,16 +748,30 @@ class BeatFrequency(Scene):
         rgb_interp = colorsys.hls_to_rgb(h, l, s)
         return rgb_to_color(rgb_interp)
 
+    def get_hsl_lut(self, color1, color2, steps=HSL_STEPS):
+        # HSL interpolation from color1 to color2, precomputed once so that
+        # colouring goes through an index lookup instead of colorsys
+        key = (ManimColor(color1).to_hex(), ManimColor(color2).to_hex(), steps)
+        if key not in self.hsl_luts:
+            self.hsl_luts[key] = [
+                self.interpolate_hsl(color1, color2, alpha)
+                for alpha in np.linspace(0, 1, steps)
+            ]
+        return self.hsl_luts[key]
+
+    def interference_factor(self, waves, t):
+        # 0 for perfect cancellation and 1 for full constructive interference,
+        # evaluated for a whole array of t at once
+        values = np.array([wave(t) for wave in waves], dtype=float)
+        total = np.abs(values.sum(axis=0))
+        total_abs = np.abs(values).sum(axis=0)
+        return np.divide(total, total_abs, out=np.ones_like(total_abs), where=total_abs > 0)
+
+    def get_colors(self, waves, t):
+        # Interpolates from destructive (RED) to constructive (GREEN) per sample
+        lut = self.get_hsl_lut(self.COLORS["destructive"], self.COLORS["constructive"])
+        factor = self.interference_factor(waves, np.atleast_1d(t))
+        return [lut[i] for i in np.rint(factor * (len(lut) - 1)).astype(int)]
+
     def get_color(self, waves, t):
-        total = sum(wave(t) for wave in waves)
-        total_abs = sum(np.abs(wave(t)) for wave in waves)
-        if total_abs == 0:
-            return self.COLORS["constructive"]  # or some default color
-        # interference_factor is 0 for perfect cancellation and 1 for full constructive interference
-        interference_factor = np.abs(total) / total_abs
-        # interpolate_color interpolates between destructive (RED) and constructive (GREEN)
-        return self.interpolate_hsl(
-            self.COLORS["destructive"],
-            self.COLORS["constructive"],
-            interference_factor
-        )
+        return self.get_colors(waves, t)[0]
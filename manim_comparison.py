@@ -4,6 +4,9 @@ from manim.typing import Image
 from manim.utils.color.X11 import BEIGE, VIOLET
 from manim.utils.color.XKCD import BLUEGREEN
 
+import image_cache
+import tex_cache
+
 
 class Comparison(Scene):
     COLORS = {
@@ -16,6 +19,10 @@ class Comparison(Scene):
         "axes": WHITE
     }
 
+    def setup(self):
+        # Compile every Tex string of construct up front, in parallel
+        tex_cache.warm_scene(self)
+
     def define_wave(self, amplitude, frequency):
         return lambda t: amplitude * np.sin(2 * PI * frequency * t)
 
@@ -63,11 +70,10 @@ class Comparison(Scene):
         brace = Brace(laser_beam, direction=DOWN) # type: ignore
         distance_label = brace.get_text("299,792,458 meters")
 
-        moon = ImageMobject("media/images/manim_comparison/moon.jpg")
-        earth = ImageMobject("media/images/manim_comparison/earth.jpg")
+        # Bitmaps pre-shrunk to their on-screen size at the render quality
+        moon = image_cache.scaled_image("media/images/manim_comparison/moon.jpg", 0.2)
+        earth = image_cache.scaled_image("media/images/manim_comparison/earth.jpg", 0.8)
 
-        earth.scale(0.8)
-        moon.scale(0.2)
         self.remove(earth)
         self.remove(moon)
         self.mobjects.insert(0, earth)
@@ -1,16 +1,145 @@
 from manim import *
+import argparse
+import hashlib
+import sys
+from pathlib import Path
+
 import numpy as np
+import scipy.fft
+from PIL import Image
+
+import tex_cache
+
+# add_coordinates typesets tick labels one character at a time
+COORDINATE_TEX = {"MathTex": list("0123456789-.")}
+
+# single-slit defaults, in metres
+WAVELENGTH = 500e-9
+SLIT_WIDTH = 1e-6
 
 def sinc(x):
-    return np.sin(x) / x
+    # sin(x) / x, and 1 at x = 0. np.sinc is the normalized sin(pi x) / (pi x),
+    # which handles the removable singularity itself.
+    return np.sinc(np.asarray(x) / np.pi)
 
 def I(x):
-    # lam = 500
-    # d = 1e3
-    # (np.sin(theta) * d) / lam
     return sinc(x) ** 2
 
+def diffraction_phase(theta, wavelength=WAVELENGTH, slit_width=SLIT_WIDTH):
+    # pi d sin(theta) / lambda
+    return np.pi * slit_width * np.sin(theta) / wavelength
+
+def intensity(theta, wavelength=WAVELENGTH, slit_width=SLIT_WIDTH, i0=1):
+    # Fraunhofer single-slit intensity I0 sinc^2(pi d sin(theta) / lambda),
+    # elementwise over any array of angles in radians
+    return i0 * I(diffraction_phase(np.asarray(theta, dtype=float), wavelength, slit_width))
+
+def intensity_table(theta_max=np.pi / 2, n=1000001, wavelength=WAVELENGTH, slit_width=SLIT_WIDTH):
+    # (n, 2) array of angle and intensity over [-theta_max, theta_max]
+    theta = np.linspace(-theta_max, theta_max, n)
+    return np.column_stack([theta, intensity(theta, wavelength, slit_width)])
+
+def export_table(table, path):
+    # .npy keeps the array as is; anything else is written as CSV
+    if str(path).endswith(".npy"):
+        np.save(path, table)
+    else:
+        np.savetxt(path, table, delimiter=",", header="theta,intensity", comments="")
+
+# samples across the aperture plane, which spans [-1, 1) in both directions
+APERTURE_SIZE = 1024
+# largest phase x = pi (width / 2) u shown, as on the Diffraction axes
+PHASE_MAX = 15
+# intensities below this fraction of the peak are black in the log image
+DYNAMIC_RANGE = 1e-5
+FAR_FIELD_CACHE = Path("media") / "fraunhofer_cache"
+
+def aperture_mask(kind="slit", size=APERTURE_SIZE, width=0.1, height=0.8, separation=0.4, slits=5):
+    # Transmission of an aperture on a size x size grid. width is the slit
+    # width (or the diameter of a circular aperture) in plane units, and any
+    # other kind is read as an image file whose brightness is the transmission.
+    y, x = np.mgrid[-1:1:size * 1j, -1:1:size * 1j]
+    tall = np.abs(y) < height / 2
+    if kind == "slit":
+        return (tall & (np.abs(x) < width / 2)).astype(np.float32)
+    if kind == "double_slit":
+        return (tall & (np.abs(np.abs(x) - separation / 2) < width / 2)).astype(np.float32)
+    if kind == "grating":
+        centers = (np.arange(slits) - (slits - 1) / 2) * separation
+        return (tall & (np.abs(x[..., None] - centers).min(axis=-1) < width / 2)).astype(np.float32)
+    if kind == "circular":
+        return (np.hypot(x, y) < width / 2).astype(np.float32)
+    image = Image.open(kind).convert("L").resize((size, size), Image.Resampling.LANCZOS)
+    return np.asarray(image, dtype=np.float32) / 255
+
+def far_field(mask, width, pixels, phase_max=PHASE_MAX, cache_dir=FAR_FIELD_CACHE):
+    # Fraunhofer intensity |FFT(mask)|^2, normalized to its peak, sampled on a
+    # pixels x pixels grid of phases x = pi (width / 2) u in [-phase_max,
+    # phase_max], u being cycles across the aperture plane. The FFT is
+    # zero-padded so that its bins are about as fine as the output pixels.
+    # Cached on disk by the aperture's content and the sampling.
+    pixels = pixels | 1  # odd, so the middle row and column are u = 0
+    size = mask.shape[0]
+    key = hashlib.sha256(mask.tobytes() + repr((mask.shape, width, pixels, phase_max)).encode()).hexdigest()
+    cached = Path(cache_dir) / f"{key}.npy"
+    if cached.exists():
+        return np.load(cached)
+
+    u_max = phase_max / (np.pi * width / 2)
+    n = scipy.fft.next_fast_len(max(size, int(np.ceil(pixels * size / (2 * u_max)))))
+    bins = np.rint(np.linspace(-u_max, u_max, pixels) * n / size).astype(int)
+    # A real aperture's spectrum is Hermitian, so horizontal frequencies >= 0
+    # are enough: negative ones are read mirrored through the origin. Only the
+    # columns shown go through the vertical transforms.
+    spectrum = scipy.fft.rfft(mask, n, axis=1, workers=-1)[:, :np.abs(bins).max() + 1]
+    spectrum = scipy.fft.fft(spectrum, n, axis=0, workers=-1)
+    rows = np.where(bins[None, :] < 0, -bins[:, None], bins[:, None]) % n
+    field = spectrum[rows, np.abs(bins)[None, :]]
+    intensity = (field.real ** 2 + field.imag ** 2).astype(np.float32)
+    intensity /= intensity.max()
+
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    np.save(cached, intensity)
+    return intensity
+
+def log_image(intensity, dynamic_range=DYNAMIC_RANGE):
+    # Grey levels of log10(intensity) across the dynamic range
+    floor = np.log10(dynamic_range)
+    level = (np.log10(np.maximum(intensity, dynamic_range)) - floor) / -floor
+    return (level * 255).astype(np.uint8)
+
+def grating_table(n_max=128, samples=8192):
+    # Grating factor (sin(N gamma) / (N sin gamma))^2 for every N in 1..n_max
+    # over one period gamma in [0, pi), as an (n_max, samples) table. It is 1
+    # at gamma = 0, the removable singularity, where every order peaks.
+    n = np.arange(1, n_max + 1)[:, None]
+    gamma = np.linspace(0, np.pi, samples, endpoint=False)[None, :]
+    sin_gamma = np.sin(gamma)
+    safe = np.where(sin_gamma == 0, 1, sin_gamma)
+    factor = np.where(sin_gamma == 0, 1, np.sin(n * gamma) / (n * safe))
+    return (factor ** 2).astype(np.float32)
+
+def grating_factor(table, n, gamma):
+    # Row n of the table at any gammas, using its period pi
+    row = table[int(n) - 1]
+    index = np.rint(np.mod(gamma, np.pi) * len(row) / np.pi).astype(int) % len(row)
+    return row[index]
+
+def column_envelope(y, columns):
+    # Indices of the minimum and maximum of each of `columns` equal runs of y,
+    # in the order they occur, plus both end points. Dense samples drawn this
+    # way keep every peak at a few points per pixel column.
+    rows = y.reshape(columns, -1)
+    offsets = np.arange(columns)[:, None] * rows.shape[1]
+    extremes = np.sort(np.stack([rows.argmin(axis=1), rows.argmax(axis=1)], axis=1), axis=1) + offsets
+    return np.unique(np.concatenate([[0], extremes.ravel(), [len(y) - 1]]))
+
 class Sinc(Scene):
+    TEX_STRINGS = COORDINATE_TEX
+
+    def setup(self):
+        tex_cache.warm_scene(self)
+
     def construct(self):
         axes = Axes(x_range=[-18,18,3],
                     y_range=[0,2.5,1],
@@ -21,13 +150,17 @@ class Sinc(Scene):
         axes.add_coordinates()
         axis_labels = axes.get_axis_labels(x_label="x", y_label="f(x)")
 
-        graph = axes.plot(sinc, x_range=[0.001, 15, 0.01], color=YELLOW)
-        graph2 = axes.plot(sinc, x_range=[-0.001, -15, -0.01], color=YELLOW)
+        graph = axes.plot(sinc, x_range=[-15, 15, 0.01], color=YELLOW, use_vectorized=True)
 
         self.play(DrawBorderThenFill(axes), Write(axis_labels), run_time=2)
-        self.play(Create(graph), Create(graph2))
+        self.play(Create(graph))
 
 class Diffraction(Scene):
+    TEX_STRINGS = COORDINATE_TEX
+
+    def setup(self):
+        tex_cache.warm_scene(self)
+
     def construct(self):
         axes = Axes(x_range=[-15,15,3],
                     y_range=[-0.2,1.2,1],
@@ -38,8 +171,7 @@ class Diffraction(Scene):
         axes.add_coordinates()
         axis_labels = axes.get_axis_labels(x_label=Tex(R"$d \cdot \sin(\theta) / \lambda$"), y_label=Tex("I"))
 
-        graph = axes.plot(I, x_range=[-0.01, -15, -0.01], color=YELLOW)
-        graph2 = axes.plot(I, x_range=[0.01, 15, 0.01], color=YELLOW)
+        graph = axes.plot(I, x_range=[-15, 15, 0.01], color=YELLOW, use_vectorized=True)
 
         # Create the equation in math mode
         equation = MathTex(
@@ -51,9 +183,128 @@ class Diffraction(Scene):
         equation.to_edge(UL, buff=0.5)
 
         self.play(DrawBorderThenFill(axes), Write(axis_labels), Write(equation), run_time=1)
-        self.play(Create(graph), Create(graph2), run_time=1)
+        self.play(Create(graph), run_time=1)
+
+class FraunhoferDiffraction(Scene):
+    TEX_STRINGS = COORDINATE_TEX
+    # "slit", "double_slit", "grating", "circular" or an image file
+    APERTURE = "slit"
+    APERTURE_WIDTH = 0.1
+    IMAGE_HEIGHT = 5
+
+    def setup(self):
+        tex_cache.warm_scene(self)
+
+    def construct(self):
+        # The far field is sampled at the image's on-screen pixel size, so its
+        # resolution follows the render quality
+        pixels = int(np.ceil(self.IMAGE_HEIGHT / config.frame_height * config.pixel_height))
+        mask = aperture_mask(self.APERTURE, width=self.APERTURE_WIDTH)
+        intensity = far_field(mask, self.APERTURE_WIDTH, pixels)
+
+        pattern = ImageMobject(log_image(intensity))
+        pattern.height = self.IMAGE_HEIGHT
+        pattern.to_edge(LEFT, buff=0.5)
+        aperture = ImageMobject((mask * 255).astype(np.uint8))
+        aperture.height = 1.5
+        aperture.next_to(pattern, RIGHT, aligned_edge=UP, buff=0.3)
+
+        axes = Axes(x_range=[-PHASE_MAX, PHASE_MAX, 5],
+                    y_range=[-0.2, 1.2, 1],
+                    x_length=6,
+                    y_length=4,
+                    axis_config={"include_tip": False, "numbers_to_exclude": [0]})
+        axes.add_coordinates()
+        axes.to_edge(RIGHT, buff=0.5).to_edge(DOWN, buff=0.8)
+        axis_labels = axes.get_axis_labels(x_label=Tex(R"$d \cdot \sin(\theta) / \lambda$"), y_label=Tex("I"))
+
+        # Cross-section through the middle of the pattern
+        x = np.linspace(-PHASE_MAX, PHASE_MAX, intensity.shape[1])
+        cross_section = VMobject(color=YELLOW)
+        cross_section.set_points_as_corners([axes.c2p(*point) for point in zip(x, intensity[len(intensity) // 2])])
+
+        self.play(FadeIn(aperture), DrawBorderThenFill(axes), Write(axis_labels), run_time=1)
+        self.play(FadeIn(pattern), Create(cross_section), run_time=2)
+        self.wait(1)
+
+class GratingSweep(Scene):
+    TEX_STRINGS = COORDINATE_TEX
+    N_MAX = 128
+    # slit spacing d over slit width a, at the start and the end of the sweep
+    SPACING = (2, 6)
+    # samples across each order's main lobe, 2 pi / (N * spacing) wide in x,
+    # at N_MAX and the widest spacing: the drawn peak stays within about 1.5 %
+    # of its true height wherever the lobe falls between samples
+    SAMPLES_PER_ORDER = 16
+
+    def setup(self):
+        tex_cache.warm_scene(self)
+
+    def construct(self):
+        axes = Axes(x_range=[-PHASE_MAX, PHASE_MAX, 3],
+                    y_range=[-0.2, 1.2, 1],
+                    x_length=10,
+                    y_length=6,
+                    axis_config={"include_tip": False, "numbers_to_exclude": [0]})
+        axes.add_coordinates()
+        axis_labels = axes.get_axis_labels(x_label=Tex(R"$a \cdot \sin(\theta) / \lambda$"), y_label=Tex("I"))
+
+        # The single-slit envelope and the grating factor table are computed
+        # once; each frame only looks the factor up and rewrites the points.
+        # The slit phase x = pi a sin(theta) / lambda makes the grating phase
+        # gamma = pi d sin(theta) / lambda equal to spacing * x.
+        # The pattern is sampled densely enough for its narrowest orders and
+        # drawn as a min/max envelope per pixel column.
+        orders = 2 * PHASE_MAX * self.N_MAX * self.SPACING[1] / (2 * np.pi)
+        columns = int(np.ceil(axes.x_length * config.pixel_width / config.frame_width))
+        samples = int(np.ceil(orders * self.SAMPLES_PER_ORDER / columns)) * columns
+        x = np.linspace(-PHASE_MAX, PHASE_MAX, samples)
+        envelope = I(x)
+        table = grating_table(self.N_MAX)
+        origin = axes.c2p(0, 0)
+        base = origin + np.outer(x, axes.c2p(1, 0) - origin)
+        unit_y = axes.c2p(0, 1) - origin
+
+        n_tracker = ValueTracker(1)
+        spacing_tracker = ValueTracker(self.SPACING[0])
+
+        envelope_graph = DashedVMobject(
+            VMobject().set_points_as_corners(base + np.outer(envelope, unit_y)),
+            num_dashes=60,
+        ).set_stroke(GRAY, width=2)
+        pattern = VMobject(color=YELLOW, stroke_width=2)
+
+        def update_pattern(graph):
+            y = envelope * grating_factor(table, n_tracker.get_value(), spacing_tracker.get_value() * x)
+            keep = column_envelope(y, columns)
+            graph.set_points_as_corners(base[keep] + np.outer(y[keep], unit_y))
+
+        update_pattern(pattern)
+        pattern.add_updater(update_pattern)
+
+        n_label = MathTex("N =").to_corner(UL, buff=0.5)
+        n_value = Integer(1).next_to(n_label, RIGHT)
+        n_value.add_updater(lambda number: number.set_value(int(n_tracker.get_value())))
+
+        self.play(DrawBorderThenFill(axes), Write(axis_labels), Write(n_label), FadeIn(n_value), run_time=1)
+        self.play(Create(envelope_graph), Create(pattern), run_time=1)
+        # Slit count, from the bare sinc^2 envelope to sharp grating orders
+        self.play(n_tracker.animate.set_value(self.N_MAX), run_time=8, rate_func=rate_functions.ease_in_quad)
+        self.wait(1)
+        # Wider spacing packs the orders closer together under the envelope
+        self.play(spacing_tracker.animate.set_value(self.SPACING[1]), run_time=6, rate_func=linear)
+        pattern.clear_updaters()
+        n_value.clear_updaters()
+        self.wait(1)
 
 if __name__ == "__main__":
-    print("hello")
-    for i in range(0, 1000):
-        print(I(i/1000))
+    parser = argparse.ArgumentParser(description="Tabulate single-slit diffraction intensity.")
+    parser.add_argument("-o", "--output", help=".npy or .csv table (default: CSV on stdout)")
+    parser.add_argument("-n", "--samples", type=int, default=1000001)
+    parser.add_argument("--theta-max", type=float, default=90, help="largest angle, in degrees")
+    parser.add_argument("--wavelength", type=float, default=WAVELENGTH * 1e9, help="in nm")
+    parser.add_argument("--slit-width", type=float, default=SLIT_WIDTH * 1e9, help="in nm")
+    args = parser.parse_args()
+
+    table = intensity_table(np.radians(args.theta_max), args.samples, args.wavelength * 1e-9, args.slit_width * 1e-9)
+    export_table(table, args.output or sys.stdout)
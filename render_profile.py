@@ -0,0 +1,198 @@
+import argparse
+import functools
+import importlib
+import inspect
+import json
+import time
+import tracemalloc
+
+from manim import Scene, config
+from manim.camera.camera import Camera
+from manim.scene.scene_file_writer import SceneFileWriter
+
+from common import QUALITY_FLAGS, git_commit, peak_rss
+
+SCENE_MODULES = ["manim_beat", "manim_autocorrelation", "manim_comparison", "manim_sinc", "manim_test"]
+# time buckets filled by the patched renderer methods while a call is running
+PHASES = ["raster", "encode", "updaters"]
+
+def describe(animations):
+    return [type(animation).__name__ for animation in animations]
+
+class RenderProfile:
+    # Times every play/wait call of the scenes rendered inside the with block.
+    # Nothing is patched outside it, so normal renders pay no overhead.
+    #
+    # Per call: construct is the time the scene spent in its own code since the
+    # previous call ended (building mobjects and graphs), raster the camera's
+    # capture_mobjects, encode the file writer, updaters Scene.update_mobjects
+    # and animate whatever is left (interpolation and manim's bookkeeping).
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.calls = []
+        self.scenes = []
+        self.current = None
+        self.last_end = None
+        self.originals = []
+
+    def patch(self, owner, name, wrapper):
+        original = getattr(owner, name)
+        self.originals.append((owner, name, original))
+        setattr(owner, name, functools.wraps(original)(wrapper(original)))
+
+    def timed(self, phase):
+        def wrapper(original):
+            def run(*args, **kwargs):
+                if self.current is None:
+                    return original(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.current[phase] += time.perf_counter() - start
+                    if phase == "encode" and original.__name__ == "write_frame":
+                        self.current["frames"] += kwargs.get("repeat", 1)
+            return run
+        return wrapper
+
+    def call(self, kind):
+        def wrapper(original):
+            def run(scene, *args, **kwargs):
+                # wait() goes through play(); record it once, as the wait
+                if self.current is not None:
+                    return original(scene, *args, **kwargs)
+                start = time.perf_counter()
+                self.current = dict(
+                    scene=type(scene).__name__,
+                    index=sum(call["scene"] == type(scene).__name__ for call in self.calls),
+                    kind=kind,
+                    animations=describe(args) if kind == "play" else [f"Wait({args[0] if args else kwargs.get('duration', 1)})"],
+                    construct=start - self.last_end,
+                    frames=0,
+                    **dict.fromkeys(PHASES, 0.0),
+                )
+                if self.trace_memory:
+                    tracemalloc.reset_peak()
+                try:
+                    return original(scene, *args, **kwargs)
+                finally:
+                    end = time.perf_counter()
+                    call, self.current = self.current, None
+                    call["total"] = end - start
+                    call["animate"] = call["total"] - sum(call[phase] for phase in PHASES)
+                    family = scene.get_mobject_family_members()
+                    call["mobjects"] = len(family)
+                    call["points"] = sum(len(mobject.points) for mobject in family)
+                    call["peak_rss"] = peak_rss()
+                    if self.trace_memory:
+                        call["traced_peak"] = tracemalloc.get_traced_memory()[1]
+                    self.calls.append(call)
+                    self.last_end = time.perf_counter()
+            return run
+        return wrapper
+
+    def render(self, original):
+        def run(scene, *args, **kwargs):
+            start = self.last_end = time.perf_counter()
+            try:
+                return original(scene, *args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                self.scenes.append({
+                    "scene": type(scene).__name__,
+                    "total": end - start,
+                    # after the last call: tear_down and joining the partial movies
+                    "finish": end - self.last_end,
+                    "calls": sum(call["scene"] == type(scene).__name__ for call in self.calls),
+                    "peak_rss": peak_rss(),
+                })
+        return run
+
+    def __enter__(self):
+        self.patch(Scene, "render", self.render)
+        self.patch(Scene, "play", self.call("play"))
+        self.patch(Scene, "wait", self.call("wait"))
+        self.patch(Scene, "update_mobjects", self.timed("updaters"))
+        self.patch(Camera, "capture_mobjects", self.timed("raster"))
+        self.patch(SceneFileWriter, "write_frame", self.timed("encode"))
+        self.patch(SceneFileWriter, "end_animation", self.timed("encode"))
+        if self.trace_memory:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        self.originals = []
+        if self.trace_memory:
+            tracemalloc.stop()
+
+    def top(self, n=10, key="total"):
+        return sorted(self.calls, key=lambda call: call[key], reverse=True)[:n]
+
+    def report(self):
+        return {"scenes": self.scenes, "calls": self.calls}
+
+def scene_classes(target):
+    # "module" selects every Scene defined in it, "module:Scene" a single one
+    module_name, _, scene_name = target.partition(":")
+    module = importlib.import_module(module_name)
+    if scene_name:
+        return [getattr(module, scene_name)]
+    return [
+        cls for _, cls in inspect.getmembers(module, inspect.isclass)
+        if issubclass(cls, Scene) and cls.__module__ == module.__name__
+    ]
+
+def format_call(call):
+    animations = ", ".join(call["animations"])
+    if len(animations) > 40:
+        animations = animations[:37] + "..."
+    return (
+        f"{call['scene']:>20} #{call['index']:<3} {animations:<40}"
+        f" {call['total']:8.2f} s  construct {call['construct']:6.2f}  animate {call['animate']:6.2f}"
+        f"  raster {call['raster']:6.2f}  encode {call['encode']:6.2f}  updaters {call['updaters']:6.2f}"
+        f"  {call['frames']:5} frames  {call['mobjects']:5} mobjects  {call['points']:8} points"
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Profile where render time goes in each play/wait call.")
+    parser.add_argument("targets", nargs="*", default=SCENE_MODULES, metavar="module[:Scene]",
+                        help="scene modules or single scenes to render (default: all scene modules)")
+    parser.add_argument("-q", "--quality", choices=QUALITY_FLAGS, default="l")
+    parser.add_argument("-o", "--output", default="render_profile.json")
+    parser.add_argument("-n", "--top", type=int, default=15, help="number of calls in the summary")
+    parser.add_argument("--sort", choices=["total", "construct", "animate", *PHASES], default="total")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record the Python allocation peak of each call (slows rendering down)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    config.quality = QUALITY_FLAGS[args.quality]
+    # cached partial movies would skip rasterization and encoding entirely
+    config.disable_caching = True
+
+    with RenderProfile(args.trace_memory) as profile:
+        for target in args.targets:
+            for cls in scene_classes(target):
+                cls().render()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "quality": config.quality,
+        **profile.report(),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for scene in profile.scenes:
+        print(f"{scene['scene']:>20}  {scene['total']:8.2f} s  {scene['calls']:4} calls  finish {scene['finish']:6.2f} s")
+    print(f"\ntop {args.top} calls by {args.sort}")
+    for call in profile.top(args.top, args.sort):
+        print(format_call(call))
+    print(f"\nwrote {args.output}")
+
+if __name__ == "__main__":
+    main()
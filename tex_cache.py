@@ -0,0 +1,117 @@
+import argparse
+import ast
+import inspect
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from manim import MathTex, Tex, config
+from manim.mobject.text import tex_mobject
+from manim.utils.tex_file_writing import compile_tex, convert_to_svg, delete_nonsvg_files, generate_tex_file
+
+# call name -> mobject class its string arguments are compiled as
+TEX_CALLS = {"Tex": Tex, "MathTex": MathTex, "get_text": Tex, "get_tex": MathTex}
+# keyword arguments that turn plain strings into MathTex labels
+LABEL_KEYWORDS = {"x_label", "y_label", "z_label"}
+# keyword arguments that change the compiled expression
+TEX_KEYWORDS = {"arg_separator", "tex_environment", "substrings_to_isolate"}
+
+class Collected(Exception):
+    # Raised in place of compiling, carrying what would have been compiled
+    pass
+
+def collect(source):
+    # (class, strings, keywords) of every Tex-like call in the source whose
+    # arguments are all literals. Computed strings are listed in TEX_STRINGS.
+    calls = []
+    for node in ast.walk(ast.parse(textwrap.dedent(source))):
+        if not isinstance(node, ast.Call):
+            continue
+        name = getattr(node.func, "id", getattr(node.func, "attr", None))
+        try:
+            if name in TEX_CALLS and node.args:
+                strings = [ast.literal_eval(arg) for arg in node.args]
+                keywords = {
+                    keyword.arg: ast.literal_eval(keyword.value)
+                    for keyword in node.keywords if keyword.arg in TEX_KEYWORDS
+                }
+                calls.append((TEX_CALLS[name], tuple(strings), keywords))
+        except ValueError:
+            pass
+        for keyword in node.keywords:
+            if keyword.arg in LABEL_KEYWORDS and isinstance(keyword.value, ast.Constant):
+                if isinstance(keyword.value.value, str):
+                    calls.append((MathTex, (keyword.value.value,), {}))
+    return calls
+
+def scene_calls(scene_class):
+    # Literal Tex calls in the scene class, plus its TEX_STRINGS hook:
+    # {"Tex": [...], "MathTex": [...]} for strings the scan cannot see
+    calls = collect(inspect.getsource(scene_class))
+    for name, strings in getattr(scene_class, "TEX_STRINGS", {}).items():
+        calls.extend((TEX_CALLS[name], (string,), {}) for string in strings)
+    return calls
+
+def expression(cls, strings, keywords):
+    # The exact (expression, environment, template) manim would compile for
+    # cls(*strings, **keywords), taken from its own constructor so the cache
+    # keys match: the compile step is swapped for one that raises Collected.
+    def capture(expression, environment=None, tex_template=None):
+        raise Collected(expression, environment, tex_template)
+
+    original = tex_mobject.tex_to_svg_file
+    tex_mobject.tex_to_svg_file = capture
+    try:
+        cls(*strings, **keywords)
+    except Collected as collected:
+        return collected.args
+    finally:
+        tex_mobject.tex_to_svg_file = original
+    return None
+
+def compile_svg(tex_file, tex_template):
+    dvi_file = compile_tex(tex_file, tex_template.tex_compiler, tex_template.output_format)
+    return convert_to_svg(dvi_file, tex_template.output_format)
+
+def warm(calls, workers=None):
+    # Compile every missing SVG concurrently. LaTeX and dvisvgm run as
+    # subprocesses, so threads are enough. Intermediate files are cleaned up
+    # once at the end, since manim's per-file cleanup would delete the DVI
+    # files of compilations still in flight.
+    jobs = {}
+    for call in calls:
+        collected = expression(*call)
+        if collected is None:
+            continue
+        expression_string, environment, tex_template = collected
+        tex_template = tex_template or config["tex_template"]
+        tex_file = generate_tex_file(expression_string, environment, tex_template)
+        if not tex_file.with_suffix(".svg").exists():
+            jobs[tex_file] = tex_template
+
+    if jobs:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(compile_svg, jobs, jobs.values()))
+        if not config["no_latex_cleanup"]:
+            delete_nonsvg_files()
+    return len(jobs)
+
+def warm_scene(scene, workers=None):
+    # Called from a scene's setup(), before construct creates any Tex
+    return warm(scene_calls(type(scene)), workers)
+
+def main(argv=None):
+    from render_profile import scene_classes
+
+    parser = argparse.ArgumentParser(description="Pre-compile the Tex strings of scenes into manim's Tex cache.")
+    parser.add_argument("targets", nargs="+", metavar="module[:Scene]")
+    parser.add_argument("-j", "--workers", type=int, help="concurrent LaTeX compilations (default: CPU count + 4)")
+    args = parser.parse_args(argv)
+
+    calls = [call for target in args.targets for cls in scene_classes(target) for call in scene_calls(cls)]
+    start = time.perf_counter()
+    compiled = warm(calls, args.workers)
+    print(f"{len(calls)} Tex strings, compiled {compiled} in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()